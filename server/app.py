@@ -5,8 +5,13 @@ from flask_cors import CORS
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from flask import Flask
+from flask_jwt_extended import jwt_required
 from models import *
-from extensions import db, migrate, jwt, bcrypt
+from extensions import db, migrate, jwt, bcrypt, catalog_cache, image_pipeline, event_broker, idempotency_store
+from kitchen import kitchen_board
+from intake import order_intake
+import commands
+from utils import outlet_required
 
 from routes.menu_routes import menu_bp
 from routes.auth_routes import auth_bp
@@ -32,6 +37,45 @@ class Config:
     JWT_COOKIE_SAMESITE = "Lax"
     JWT_ACCESS_COOKIE_PATH = "/"
 
+    # catalog cache (outlets / menu listings)
+    CATALOG_CACHE_MAXSIZE = int(os.getenv("CATALOG_CACHE_MAXSIZE", 512))
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", 300))
+    CATALOG_CACHE_MAX_COUNTERS = int(os.getenv("CATALOG_CACHE_MAX_COUNTERS", 10000))  # invalidation scopes
+
+    # menu image uploads
+    UPLOAD_URL_PREFIX = os.getenv("UPLOAD_URL_PREFIX", "http://localhost:5000/static/uploads")
+    IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+    IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+    # server-sent event streams
+    EVENT_STREAM_HEARTBEAT = 15
+    EVENT_STREAM_HISTORY = 100
+    # e.g. redis://localhost:6379/0 to share events between workers; needs the
+    # optional redis package, which is not in the Pipfile
+    EVENT_BACKEND_URL = os.getenv("EVENT_BACKEND_URL")
+
+    # Idempotency-Key replay window for order / payment endpoints
+    IDEMPOTENCY_TTL = 24 * 3600
+    IDEMPOTENCY_WAIT_TIMEOUT = 30
+
+    # kitchen queue ETAs: parallel stations per outlet, handover buffer (min)
+    KITCHEN_STATIONS = int(os.getenv("KITCHEN_STATIONS", 2))
+    KITCHEN_BUFFER_MINUTES = 12
+    KITCHEN_RESYNC_SECONDS = 60
+
+    # async order intake: 202 + intent status URL, placed by a worker pool
+    ORDER_INTAKE_ASYNC = os.getenv("ORDER_INTAKE_ASYNC", "false").lower() == "true"
+    ORDER_INTAKE_WORKERS = int(os.getenv("ORDER_INTAKE_WORKERS", 4))
+    ORDER_INTAKE_CAPACITY = int(os.getenv("ORDER_INTAKE_CAPACITY", 64))  # queued + running
+    ORDER_INTAKE_RETRY_AFTER = 2
+
+    # reservation day grid (GET /reservations/availability)
+    RESERVATION_OPENING_HOURS = ("08:00", "22:00")
+    RESERVATION_SLOT_MINUTES = 30
+
+    # flask archive-orders: finished orders older than this leave the live tables
+    ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", 90))
+
 def create_app():
     app = Flask(__name__)
     CORS(
@@ -48,6 +92,13 @@ def create_app():
     migrate.init_app(app, db)
     jwt.init_app(app)
     bcrypt.init_app(app)
+    catalog_cache.init_app(app)
+    image_pipeline.init_app(app)
+    event_broker.init_app(app)
+    idempotency_store.init_app(app)
+    kitchen_board.init_app(app)
+    order_intake.init_app(app)
+    commands.init_app(app)
 
     #  register blueprints
     app.register_blueprint(menu_bp)
@@ -66,6 +117,13 @@ def create_app():
         db.session.execute(text("SELECT 1"))
         return {"db": "connected"}, 200
 
+    # Operational: outlet owners only
+    @app.route("/cache/stats")
+    @jwt_required()
+    @outlet_required
+    def cache_stats():
+        return catalog_cache.stats(), 200
+
     return app
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+from sqlalchemy import delete, insert, select, union_all
+
+from extensions import db
+from models import Order, OrderItem, OrderIntent, ArchivedOrder, ArchivedOrderItem
+
+
+ARCHIVABLE_STATUSES = ("completed", "cancelled")
+
+
+# ORDER ARCHIVE
+#
+# Finished orders older than the cutoff move to orders_archive and
+# order_items_archive in id-ordered batches, each batch one short
+# transaction: copy orders, copy items, delete items, delete orders. The
+# live tables stay small for listings and the kitchen; reports read both
+# through order_history() / order_item_history().
+
+def _shared_columns(live, archived):
+    return [c.name for c in live.__table__.c if c.name in archived.__table__.c]
+
+
+ORDER_COLUMNS = _shared_columns(Order, ArchivedOrder)
+ORDER_ITEM_COLUMNS = _shared_columns(OrderItem, ArchivedOrderItem)
+
+
+def order_history():
+    """Live and archived orders as one selectable with the orders columns."""
+    return union_all(
+        select(*(Order.__table__.c[name] for name in ORDER_COLUMNS)),
+        select(*(ArchivedOrder.__table__.c[name] for name in ORDER_COLUMNS))
+    ).subquery("order_history")
+
+
+def order_item_history():
+    """Live and archived order lines as one selectable."""
+    return union_all(
+        select(*(OrderItem.__table__.c[name] for name in ORDER_ITEM_COLUMNS)),
+        select(*(ArchivedOrderItem.__table__.c[name] for name in ORDER_ITEM_COLUMNS))
+    ).subquery("order_item_history")
+
+
+def archive_orders(cutoff, batch_size=1000):
+    """
+    Move finished orders created before `cutoff` into the archive.
+
+    Returns (orders moved, order items moved).
+    """
+    orders_moved, items_moved = 0, 0
+    last_id = 0
+
+    while True:
+        ids = db.session.execute(
+            select(Order.id)
+            .where(
+                Order.id > last_id,
+                Order.status.in_(ARCHIVABLE_STATUSES),
+                Order.created_at < cutoff
+            )
+            .order_by(Order.id)
+            .limit(batch_size)
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        db.session.execute(
+            insert(ArchivedOrder.__table__).from_select(
+                ORDER_COLUMNS,
+                select(*(Order.__table__.c[name] for name in ORDER_COLUMNS))
+                .where(Order.id.in_(ids))
+            )
+        )
+        db.session.execute(
+            insert(ArchivedOrderItem.__table__).from_select(
+                ORDER_ITEM_COLUMNS,
+                select(*(OrderItem.__table__.c[name] for name in ORDER_ITEM_COLUMNS))
+                .where(OrderItem.order_id.in_(ids))
+            )
+        )
+
+        # Intents only matter while an order is being placed
+        db.session.execute(delete(OrderIntent).where(OrderIntent.order_id.in_(ids)))
+        items = db.session.execute(delete(OrderItem).where(OrderItem.order_id.in_(ids))).rowcount
+        db.session.execute(delete(Order).where(Order.id.in_(ids)))
+        db.session.commit()
+
+        orders_moved += len(ids)
+        items_moved += items
+        last_id = ids[-1]
+
+    return orders_moved, items_moved
@@ -0,0 +1,241 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from sqlalchemy import DDL, event, select, text
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db, catalog_cache
+from models import Reservation, FoodCourtTable
+
+
+ACTIVE_RESERVATION_STATUSES = ("pending", "confirmed")
+RESERVATION_DURATION = timedelta(hours=1)
+
+
+# DOUBLE-BOOKING GUARD
+#
+# Overlapping active reservations on one table are refused by the database
+# itself, so two concurrent bookings cannot both pass the check in the
+# view. Postgres uses an exclusion constraint over (table_id, tsrange);
+# SQLite, which runs one writer at a time, uses triggers. Rows without an
+# end_time never conflict, as in the overlap checks below.
+
+BOOKING_CONFLICT = "reservation_overlap"
+
+_SQLITE_GUARD_CHECK = (
+    "WHEN NEW.status IN ('pending', 'confirmed') AND NEW.end_time IS NOT NULL "
+    "BEGIN SELECT RAISE(ABORT, '" + BOOKING_CONFLICT + "') WHERE EXISTS ("
+    "SELECT 1 FROM reservations r WHERE r.table_id = NEW.table_id AND r.id IS NOT NEW.id "
+    "AND r.status IN ('pending', 'confirmed') "
+    "AND r.time_reserved_for < NEW.end_time AND r.end_time > NEW.time_reserved_for); END"
+)
+
+SQLITE_GUARD_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS tr_reservations_overlap_insert "
+    "BEFORE INSERT ON reservations " + _SQLITE_GUARD_CHECK,
+    "CREATE TRIGGER IF NOT EXISTS tr_reservations_overlap_update "
+    "BEFORE UPDATE OF table_id, time_reserved_for, end_time, status ON reservations "
+    + _SQLITE_GUARD_CHECK,
+]
+
+PG_GUARD_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "DO $$ BEGIN "
+    "IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '" + BOOKING_CONFLICT + "') THEN "
+    "ALTER TABLE reservations ADD CONSTRAINT " + BOOKING_CONFLICT + " "
+    "EXCLUDE USING gist (table_id WITH =, tsrange(time_reserved_for, end_time) WITH &&) "
+    "WHERE (status IN ('pending', 'confirmed') AND end_time IS NOT NULL); "
+    "END IF; END $$",
+]
+
+# Installed together with the reservations table (db.create_all)
+for statement in SQLITE_GUARD_DDL:
+    event.listen(Reservation.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in PG_GUARD_DDL:
+    event.listen(Reservation.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+
+def install_booking_guard():
+    """Add the guard to a database created before it existed."""
+    statements = {
+        "sqlite": SQLITE_GUARD_DDL,
+        "postgresql": PG_GUARD_DDL
+    }.get(db.engine.dialect.name, [])
+    for statement in statements:
+        db.session.execute(text(statement))
+    return bool(statements)
+
+
+def is_booking_conflict(error):
+    """True if an IntegrityError came from the double-booking guard."""
+    if not isinstance(error, IntegrityError):
+        return False
+    orig = error.orig
+    return (
+        getattr(orig, "pgcode", None) == "23P01"  # exclusion_violation
+        or BOOKING_CONFLICT in str(orig)
+    )
+
+
+# TABLE AVAILABILITY
+#
+# "Which tables are taken in [start, end)" is one set-based query over the
+# reservations instead of one overlap query per table. Callers get plain
+# ids / dicts back; FoodCourtTable rows are never modified.
+
+def busy_table_ids(start, end, outlet_id=None, exclude_id=None):
+    """Ids of tables with an active reservation overlapping [start, end)."""
+    query = select(Reservation.table_id).distinct().where(
+        Reservation.status.in_(ACTIVE_RESERVATION_STATUSES),
+        # Overlap logic: (StartA < EndB) and (EndA > StartB)
+        Reservation.time_reserved_for < end,
+        Reservation.end_time > start
+    )
+
+    if outlet_id is not None:
+        query = query.where(Reservation.table_id.in_(
+            select(FoodCourtTable.id).where(FoodCourtTable.outlet_id == outlet_id)
+        ))
+
+    if exclude_id is not None:
+        query = query.where(Reservation.id != exclude_id)
+
+    return set(db.session.execute(query).scalars())
+
+
+def table_availability(tables, start, end, outlet_id=None):
+    """{table_id: is_available} for `tables` in [start, end); closed tables stay closed."""
+    busy = busy_table_ids(start, end, outlet_id=outlet_id)
+    return {t.id: t.is_available and t.id not in busy for t in tables}
+
+
+# BEST-FIT TABLE ASSIGNMENT
+#
+# Each outlet's open tables are kept sorted by capacity (cached, rebuilt
+# after the cache TTL). A party gets the smallest table that seats it and
+# is free for the whole slot, leaving the big tables for big parties.
+
+def capacity_index(outlet_id):
+    """[(capacity, table_number, table_id)] of the outlet's open tables, smallest first."""
+    def load():
+        rows = db.session.query(
+            FoodCourtTable.capacity,
+            FoodCourtTable.table_number,
+            FoodCourtTable.id
+        ).filter(
+            FoodCourtTable.outlet_id == outlet_id,
+            FoodCourtTable.is_available != False
+        ).all()
+        return sorted(tuple(row) for row in rows)
+
+    return catalog_cache.get_or_set(f"tables:{outlet_id}", "capacity_index", load)
+
+
+def pick_table(index, guests, busy):
+    """Smallest entry of `index` seating `guests` whose id is not in `busy`."""
+    for capacity, table_number, table_id in index[bisect_left(index, (guests,)):]:
+        if table_id not in busy:
+            return table_id
+    return None
+
+
+def best_fit_table(outlet_id, guests, start, end, exclude=()):
+    """Id of the best free table for `guests` in [start, end) not in `exclude`, or None."""
+    index = capacity_index(outlet_id)
+    if not index or index[-1][0] < guests:
+        return None
+    busy = busy_table_ids(start, end, outlet_id=outlet_id)
+    return pick_table(index, guests, busy.union(exclude))
+
+
+# DAY GRID
+#
+# Free intervals per table for one outlet and day. The day's reservations
+# are read once, sorted by start, and swept in a single pass: each table
+# keeps the time it is free from, a reservation starting later than that
+# closes a free interval. Intervals are then snapped to the slot grid.
+
+def grid_scope(outlet_id, day):
+    return f"reservations:{outlet_id}:{day.isoformat()}"
+
+
+def invalidate_day(outlet_id, when):
+    """Drop cached grids after a reservation on `outlet_id` at `when` changed."""
+    if outlet_id is not None and when is not None:
+        catalog_cache.invalidate(grid_scope(outlet_id, when.date()))
+
+
+def day_grid(outlet_id, day, opening, closing, slot_minutes, duration=RESERVATION_DURATION):
+    open_at = datetime.combine(day, opening)
+    close_at = datetime.combine(day, closing)
+    slot = timedelta(minutes=slot_minutes)
+
+    tables = db.session.query(
+        FoodCourtTable.id,
+        FoodCourtTable.table_number,
+        FoodCourtTable.capacity,
+        FoodCourtTable.is_available
+    ).filter(FoodCourtTable.outlet_id == outlet_id)\
+        .order_by(FoodCourtTable.table_number)\
+        .all()
+
+    reservations = db.session.query(
+        Reservation.table_id,
+        Reservation.time_reserved_for,
+        Reservation.end_time
+    ).filter(
+        Reservation.table_id.in_([t.id for t in tables]),
+        Reservation.status.in_(ACTIVE_RESERVATION_STATUSES),
+        Reservation.time_reserved_for < close_at,
+        Reservation.end_time > open_at
+    ).order_by(Reservation.time_reserved_for).all()
+
+    free_from = {t.id: open_at for t in tables}
+    free = {t.id: [] for t in tables}
+
+    for table_id, start, end in reservations:
+        if start > free_from[table_id]:
+            free[table_id].append((free_from[table_id], start))
+        free_from[table_id] = max(free_from[table_id], end)
+
+    for table_id, since in free_from.items():
+        if since < close_at:
+            free[table_id].append((since, close_at))
+
+    def snap(start, end):
+        # Round the start up and the end down to the slot grid
+        start = open_at + -((open_at - start) // slot) * slot
+        end = open_at + ((end - open_at) // slot) * slot
+        return start, end
+
+    result = []
+    for t in tables:
+        intervals, slots = [], []
+        if t.is_available is not False:
+            for start, end in free[t.id]:
+                start, end = snap(start, end)
+                if start >= end:
+                    continue
+                intervals.append({"start": start.strftime("%H:%M"), "end": end.strftime("%H:%M")})
+                begin = start
+                while begin + duration <= end:
+                    slots.append(begin.strftime("%H:%M"))
+                    begin += slot
+
+        result.append({
+            "table_id": t.id,
+            "table_number": t.table_number,
+            "capacity": t.capacity,
+            "free": intervals,
+            "slots": slots
+        })
+
+    return {
+        "outlet_id": outlet_id,
+        "date": day.isoformat(),
+        "opening": opening.strftime("%H:%M"),
+        "closing": closing.strftime("%H:%M"),
+        "slot_minutes": slot_minutes,
+        "tables": result
+    }
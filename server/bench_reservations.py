@@ -0,0 +1,196 @@
+"""
+Booking throughput under contention: database guard vs. table lock.
+
+Many threads try to book a handful of tables over a handful of hours, so
+most attempts collide. Two strategies are timed on the same workload:
+
+  guard       insert and let the double-booking guard refuse overlaps
+  table-lock  serialize check-then-insert (LOCK TABLE on Postgres, a
+              process-wide mutex on SQLite, which has no table locks)
+
+Usage:
+  python bench_reservations.py [--database-url URL] [--threads 16] [--attempts 50]
+
+Defaults to a throwaway SQLite file. Point --database-url at an empty
+Postgres database to measure the exclusion constraint. Tables are
+dropped and recreated.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+import app as app_module
+from extensions import db
+from models import Customer, Outlet, FoodCourtTable, Reservation
+from availability import (
+    ACTIVE_RESERVATION_STATUSES,
+    RESERVATION_DURATION,
+    install_booking_guard,
+    is_booking_conflict
+)
+
+
+DAY = datetime(2031, 1, 6, 10, 0)
+
+
+def make_app(database_url):
+    app_module.Config.SQLALCHEMY_DATABASE_URI = database_url
+    app_module.Config.SQLALCHEMY_ENGINE_OPTIONS = (
+        {"connect_args": {"timeout": 30}} if database_url.startswith("sqlite") else {}
+    )
+    return app_module.create_app()
+
+
+def reset(app, tables):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        outlet = Outlet(owner_name="Bench", outlet_name="Bench Grill", email="bench@x.com", password="secret1", cuisine_type="Bench")
+        customer = Customer(email="bench-c@x.com", password="secret1", first_name="Bench", last_name="User")
+        db.session.add_all([outlet, customer])
+        db.session.flush()
+
+        table_ids = []
+        for n in range(1, tables + 1):
+            table = FoodCourtTable(outlet_id=outlet.id, table_number=n, capacity=4)
+            db.session.add(table)
+            db.session.flush()
+            table_ids.append(table.id)
+
+        db.session.commit()
+        return outlet.id, customer.id, table_ids
+
+
+def drop_guard():
+    if db.engine.dialect.name == "sqlite":
+        db.session.execute(text("DROP TRIGGER IF EXISTS tr_reservations_overlap_insert"))
+        db.session.execute(text("DROP TRIGGER IF EXISTS tr_reservations_overlap_update"))
+    elif db.engine.dialect.name == "postgresql":
+        db.session.execute(text("ALTER TABLE reservations DROP CONSTRAINT IF EXISTS reservation_overlap"))
+    db.session.commit()
+
+
+def book_with_guard(reservation):
+    db.session.add(reservation)
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_booking_conflict(e):
+            raise
+        return False
+
+
+_mutex = threading.Lock()
+
+
+def book_with_table_lock(reservation):
+    def check_and_insert():
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute(text("LOCK TABLE reservations IN SHARE ROW EXCLUSIVE MODE"))
+
+        overlapping = db.session.query(Reservation.id).filter(
+            Reservation.table_id == reservation.table_id,
+            Reservation.status.in_(ACTIVE_RESERVATION_STATUSES),
+            Reservation.time_reserved_for < reservation.end_time,
+            Reservation.end_time > reservation.time_reserved_for
+        ).first()
+
+        if overlapping:
+            db.session.rollback()
+            return False
+
+        db.session.add(reservation)
+        db.session.commit()
+        return True
+
+    if db.engine.dialect.name == "postgresql":
+        return check_and_insert()
+
+    with _mutex:
+        return check_and_insert()
+
+
+def run(app, strategy, book, threads, attempts, seed_rows):
+    outlet_id, customer_id, table_ids = seed_rows
+    booked = [0] * threads
+
+    def worker(index):
+        rng = random.Random(index)
+        with app.app_context():
+            for _ in range(attempts):
+                start = DAY + timedelta(minutes=30 * rng.randrange(16))
+                reservation = Reservation(
+                    customer_id=customer_id,
+                    outlet_id=outlet_id,
+                    table_id=rng.choice(table_ids),
+                    time_reserved_for=start,
+                    end_time=start + RESERVATION_DURATION,
+                    number_of_guests=2,
+                    status="pending"
+                )
+                if book(reservation):
+                    booked[index] += 1
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        double_booked = db.session.execute(text(
+            "SELECT COUNT(*) FROM reservations a JOIN reservations b "
+            "ON a.table_id = b.table_id AND a.id < b.id "
+            "AND a.time_reserved_for < b.end_time AND a.end_time > b.time_reserved_for"
+        )).scalar()
+
+    total = threads * attempts
+    print(
+        f"{strategy:<11} {total:>8} {sum(booked):>7} {total - sum(booked):>9} "
+        f"{elapsed:>8.2f}s {total / elapsed:>10.0f}/s {double_booked:>7}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--attempts", type=int, default=50, help="booking attempts per thread")
+    parser.add_argument("--tables", type=int, default=4)
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+
+    app = make_app(database_url)
+    print(f"{args.threads} threads x {args.attempts} attempts on {args.tables} tables ({database_url.split(':')[0]})")
+    print(f"{'strategy':<11} {'attempts':>8} {'booked':>7} {'conflicts':>9} {'time':>9} {'throughput':>12} {'overlap':>7}")
+
+    seed_rows = reset(app, args.tables)
+    with app.app_context():
+        install_booking_guard()
+        db.session.commit()
+    run(app, "guard", book_with_guard, args.threads, args.attempts, seed_rows)
+
+    seed_rows = reset(app, args.tables)
+    with app.app_context():
+        drop_guard()
+    run(app, "table-lock", book_with_table_lock, args.threads, args.attempts, seed_rows)
+
+
+if __name__ == "__main__":
+    main()
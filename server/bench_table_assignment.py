@@ -0,0 +1,89 @@
+"""
+Seat utilization over simulated days: manual table choice vs. best fit.
+
+Parties of 1-6 arrive in random order asking for a one-hour slot during
+opening hours. "manual" seats each party at a random free table that fits
+(what customers do when they pick the table themselves); "best-fit" uses
+availability.pick_table, the smallest free table that fits. Both see the
+same requests on the same floor plan.
+
+Usage:
+  python bench_table_assignment.py [--days 200] [--requests 90] [--seed 7]
+"""
+import argparse
+import random
+from collections import defaultdict
+
+from availability import pick_table
+
+
+FLOOR = [2, 2, 2, 4, 4, 4, 6, 6]   # table capacities of a typical outlet
+SLOTS = list(range(8, 22))          # hourly slots, 08:00 - 21:00 starts
+PARTY_SIZES = [1, 2, 2, 2, 3, 4, 4, 5, 6, 6]
+
+
+def make_requests(rng, count):
+    return [(rng.choice(PARTY_SIZES), rng.choice(SLOTS)) for _ in range(count)]
+
+
+def manual_choice(rng):
+    def choose(index, guests, busy):
+        fitting = [t for capacity, _, t in index if capacity >= guests and t not in busy]
+        return rng.choice(fitting) if fitting else None
+    return choose
+
+
+def simulate(requests, choose):
+    index = sorted((capacity, number, number) for number, capacity in enumerate(FLOOR, 1))
+    capacity = {table_id: cap for cap, _, table_id in index}
+    taken = defaultdict(set)   # slot -> busy table ids
+
+    seated, refused, used_seats = 0, 0, 0
+    for guests, slot in requests:
+        table_id = choose(index, guests, taken[slot])
+        if table_id is None:
+            refused += 1
+            continue
+        taken[slot].add(table_id)
+        seated += guests
+        used_seats += capacity[table_id]
+
+    return {
+        "seated": seated,
+        "refused": refused,
+        "utilization": seated / (sum(FLOOR) * len(SLOTS)),
+        "seat_fit": seated / used_seats if used_seats else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--days", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=90, help="booking requests per day")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    totals = {"manual": defaultdict(float), "best-fit": defaultdict(float)}
+
+    for _ in range(args.days):
+        requests = make_requests(rng, args.requests)
+        for name, choose in (("manual", manual_choice(rng)), ("best-fit", pick_table)):
+            for key, value in simulate(requests, choose).items():
+                totals[name][key] += value
+
+    print(f"{args.days} days, {args.requests} requests/day, tables {FLOOR}")
+    print(f"{'strategy':<9} {'guests/day':>10} {'refused/day':>11} {'utilization':>11} {'seat fit':>8}")
+    for name, total in totals.items():
+        print(
+            f"{name:<9} {total['seated'] / args.days:>10.1f} {total['refused'] / args.days:>11.1f} "
+            f"{total['utilization'] / args.days:>11.1%} {total['seat_fit'] / args.days:>8.1%}"
+        )
+
+    manual, best = totals["manual"], totals["best-fit"]
+    gain = (best["utilization"] - manual["utilization"]) / manual["utilization"]
+    print(f"best-fit seats {gain:+.1%} more guests than manual choice")
+
+
+if __name__ == "__main__":
+    main()
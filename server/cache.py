@@ -0,0 +1,204 @@
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+
+# BACKENDS
+#
+# A backend only has to store opaque values under string keys and keep a few
+# integer counters. Swap MemoryBackend for a shared one (redis, memcached...)
+# by passing it to CatalogCache.init_app.
+
+class CacheBackend(ABC):
+
+    # Identifies the lifetime of the stored counters. A fresh backend starts
+    # its counters at zero again, the epoch keeps old ETags from matching.
+    epoch = "0"
+
+    @abstractmethod
+    def get(self, key):
+        ...
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        ...
+
+    @abstractmethod
+    def delete(self, key):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @abstractmethod
+    def counter(self, name):
+        ...
+
+    @abstractmethod
+    def incr(self, name):
+        ...
+
+    def __len__(self):
+        return 0
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, maxsize=512, ttl=300, max_counters=10000):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_counters = max_counters
+        self.evictions = 0
+        self.epoch = uuid.uuid4().hex[:8]
+        self._data = OrderedDict()
+        self._counters = OrderedDict()
+        self._counter_floor = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # Scopes come and go (one per outlet-day, per table...), so counters are
+    # bounded too, least recently bumped first. A counter that is gone reads
+    # as the highest value ever evicted: never below a generation it had, so
+    # entries cached under an invalidated generation stay unreachable.
+    def counter(self, name):
+        return self._counters.get(name, self._counter_floor)
+
+    def incr(self, name):
+        with self._lock:
+            value = self._counters.pop(name, self._counter_floor) + 1
+            self._counters[name] = value
+
+            while len(self._counters) > self.max_counters:
+                _, evicted = self._counters.popitem(last=False)
+                self._counter_floor = max(self._counter_floor, evicted)
+
+            return value
+
+    def __len__(self):
+        return len(self._data)
+
+
+# CATALOG CACHE
+#
+# Entries are grouped into scopes ("outlets", "menu", "outlet:<id>"). Every
+# scope has a generation counter that is part of the cache key, so
+# invalidating a scope is a single increment: old entries simply stop being
+# reachable and age out of the LRU.
+
+class CatalogCache:
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, backend=None):
+        if backend is not None:
+            self.backend = backend
+        elif self.backend is None:
+            self.backend = MemoryBackend(
+                maxsize=app.config.get("CATALOG_CACHE_MAXSIZE", 512),
+                ttl=app.config.get("CATALOG_CACHE_TTL", 300),
+                max_counters=app.config.get("CATALOG_CACHE_MAX_COUNTERS", 10000)
+            )
+        app.extensions["catalog_cache"] = self
+
+    def generation(self, scope):
+        return self.backend.counter(f"gen:{scope}")
+
+    def version(self, scopes):
+        if isinstance(scopes, str):
+            scopes = [scopes]
+        return ",".join(f"{s}@{self.generation(s)}" for s in scopes)
+
+    def key(self, scopes, name):
+        return f"{self.version(scopes)}:{name}"
+
+    def etag(self, scopes):
+        # Strong validator: changes whenever any of the scopes is invalidated
+        return f"{self.backend.epoch}.{self.version(scopes)}"
+
+    def get_or_set(self, scopes, name, loader, ttl=None):
+        key = self.key(scopes, name)
+        value = self.backend.get(key)
+
+        if value is not None:
+            with self._lock:
+                self.hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+
+        value = loader()
+        self.backend.set(key, value, ttl=ttl)
+        return value
+
+    def invalidate(self, *scopes):
+        for scope in scopes:
+            self.backend.incr(f"gen:{scope}")
+
+    def invalidate_outlet(self, outlet_id):
+        # Menu item writes: the global menu and the outlet's own views
+        self.invalidate("menu", f"outlet:{outlet_id}")
+
+    def invalidate_outlets(self, outlet_id=None):
+        # Outlet writes: the outlet list and anything embedding outlet data
+        scopes = ["outlets", "menu"]
+        if outlet_id is not None:
+            scopes.append(f"outlet:{outlet_id}")
+        self.invalidate(*scopes)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "size": len(self.backend),
+            "evictions": getattr(self.backend, "evictions", None)
+        }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,204 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from sqlalchemy import inspect, text, bindparam, update
+from flask.cli import with_appcontext
+
+from extensions import db, catalog_cache
+from models import Order, OrderIntent, ArchivedOrder, ArchivedOrderItem
+from search import search_index
+from sales import rebuild_sales
+from intake import order_intake
+from archive import archive_orders as move_orders_to_archive
+from availability import install_booking_guard
+
+
+# MAINTENANCE COMMANDS (flask <command>)
+
+@click.command("search-reindex")
+@with_appcontext
+def search_reindex():
+    """Create the menu search index if missing and rebuild it."""
+    search_index.create()
+    count = search_index.rebuild()
+    db.session.commit()
+    catalog_cache.invalidate("menu")
+    click.echo(f"Indexed {count} menu items")
+
+
+@click.command("sales-rebuild")
+@with_appcontext
+def sales_rebuild():
+    """Recompute the best-seller counters from order history."""
+    count = rebuild_sales()
+    db.session.commit()
+    click.echo(f"Rebuilt sales counters for {count} menu items")
+
+
+@click.command("backfill-order-outlets")
+@click.option("--batch-size", default=1000, show_default=True)
+@with_appcontext
+def backfill_order_outlets(batch_size):
+    """Add orders.outlet_id to an existing database and fill it from order items."""
+    inspector = inspect(db.engine)
+
+    if "outlet_id" not in {c["name"] for c in inspector.get_columns("orders")}:
+        db.session.execute(text(
+            "ALTER TABLE orders ADD COLUMN outlet_id INTEGER REFERENCES outlets(id)"
+        ))
+        db.session.commit()
+        click.echo("Added orders.outlet_id")
+
+    existing_indexes = {i["name"] for i in inspector.get_indexes("orders")}
+    for index in Order.__table__.indexes:
+        if index.name not in existing_indexes:
+            index.create(db.session.connection())
+            click.echo(f"Created {index.name}")
+    db.session.commit()
+
+    backfill = text(
+        "UPDATE orders SET outlet_id = ("
+        "SELECT mi.outlet_id FROM order_items oi "
+        "JOIN menu_items mi ON mi.id = oi.menu_item_id "
+        "WHERE oi.order_id = orders.id LIMIT 1"
+        ") WHERE id IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+
+    last_id, updated = 0, 0
+    while True:
+        ids = db.session.execute(
+            text(
+                "SELECT id FROM orders WHERE outlet_id IS NULL AND id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": batch_size}
+        ).scalars().all()
+
+        if not ids:
+            break
+
+        db.session.execute(backfill, {"ids": ids})
+        db.session.commit()
+
+        updated += len(ids)
+        last_id = ids[-1]
+
+    click.echo(f"Backfilled outlet_id on {updated} orders")
+
+
+@click.command("finalize-order-intents")
+@click.option("--older-than", default=300, show_default=True, help="Seconds since the intent was last touched")
+@with_appcontext
+def finalize_order_intents(older_than):
+    """Place orders for intents a stopped intake worker left behind."""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+
+    # An intent completes in its order's transaction, so one stuck in
+    # processing has no order yet and is safe to run again
+    db.session.execute(
+        update(OrderIntent)
+        .where(OrderIntent.status == "processing", OrderIntent.updated_at < cutoff)
+        .values(status="queued")
+    )
+    db.session.commit()
+
+    ids = [
+        intent_id for (intent_id,) in db.session.query(OrderIntent.id)
+        .filter(OrderIntent.status == "queued", OrderIntent.created_at < cutoff)
+        .order_by(OrderIntent.created_at)
+        .all()
+    ]
+
+    outcomes = Counter(order_intake.finalize(intent_id) for intent_id in ids)
+    click.echo(
+        f"Finalized {len(ids)} order intents: "
+        f"{outcomes['completed']} completed, {outcomes['failed']} failed"
+    )
+
+
+@click.command("archive-orders")
+@click.option("--days", type=int, default=None, help="Archive finished orders older than this [ORDER_ARCHIVE_AFTER_DAYS]")
+@click.option("--batch-size", default=1000, show_default=True)
+@with_appcontext
+def archive_orders(days, batch_size):
+    """Move completed / cancelled orders into the archive tables."""
+    if days is None:
+        days = current_app.config.get("ORDER_ARCHIVE_AFTER_DAYS", 90)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    inspector = inspect(db.engine)
+    for model in (ArchivedOrder, ArchivedOrderItem):
+        if not inspector.has_table(model.__tablename__):
+            raise click.ClickException(
+                f"Table {model.__tablename__} is missing, run `flask create-tables` first"
+            )
+
+    started = time.perf_counter()
+    orders, items = move_orders_to_archive(cutoff, batch_size)
+    elapsed = time.perf_counter() - started
+
+    click.echo(
+        f"Archived {orders} orders and {items} order items "
+        f"older than {days} days in {elapsed:.2f}s"
+    )
+
+
+@click.command("install-booking-guard")
+@with_appcontext
+def install_booking_guard_command():
+    """Add the database-level double-booking guard to an existing database."""
+    if install_booking_guard():
+        db.session.commit()
+        click.echo("Double-booking guard installed")
+    else:
+        click.echo(f"No double-booking guard for {db.engine.dialect.name}")
+
+
+@click.command("create-tables")
+@with_appcontext
+def create_tables():
+    """Create tables declared on the models that an existing database lacks."""
+    inspector = inspect(db.engine)
+    missing = [t.name for t in db.metadata.sorted_tables if not inspector.has_table(t.name)]
+
+    # Only creates what is missing, with its indexes and guards
+    db.create_all()
+
+    for name in missing:
+        click.echo(f"Created {name}")
+    click.echo(f"Created {len(missing)} missing tables")
+
+
+@click.command("create-indexes")
+@with_appcontext
+def create_indexes():
+    """Create indexes declared on the models that an existing database lacks."""
+    inspector = inspect(db.engine)
+    created = 0
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.session.connection())
+                click.echo(f"Created {index.name}")
+                created += 1
+
+    db.session.commit()
+    click.echo(f"Created {created} missing indexes")
+
+
+def init_app(app):
+    app.cli.add_command(search_reindex)
+    app.cli.add_command(sales_rebuild)
+    app.cli.add_command(backfill_order_outlets)
+    app.cli.add_command(finalize_order_intents)
+    app.cli.add_command(archive_orders)
+    app.cli.add_command(install_booking_guard_command)
+    app.cli.add_command(create_tables)
+    app.cli.add_command(create_indexes)
@@ -0,0 +1,237 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+
+logger = logging.getLogger(__name__)
+
+
+# BACKENDS
+#
+# A backend moves published messages to every worker process and hands out
+# event ids. LocalBackend is enough for a single process; RedisBackend fans
+# out through redis pub/sub so every worker's streams see every event.
+# Ids go out as "<epoch>-<n>": n only grows while the backend's counter
+# lives, the epoch tells a restarted counter from the one a client saw.
+
+class EventBackend(ABC):
+
+    epoch = "0"
+
+    def start(self, deliver):
+        """Call `deliver(channel, message)` for every published message."""
+        self.deliver = deliver
+
+    @abstractmethod
+    def next_id(self):
+        ...
+
+    @abstractmethod
+    def publish(self, channel, message):
+        ...
+
+
+class LocalBackend(EventBackend):
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+
+class RedisBackend(EventBackend):
+
+    prefix = "foodcourt:events"
+
+    def __init__(self, url):
+        # Optional dependency, only needed for multi-worker setups
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError(
+                "EVENT_BACKEND_URL is set but the redis package is not installed "
+                "(pipenv install redis), unset it to use the in-process backend"
+            ) from None
+
+        self._redis = redis.Redis.from_url(url)
+
+        # Shared by every worker; a wiped redis (counter back at 0) gets a new one
+        self._redis.set(f"{self.prefix}:epoch", uuid.uuid4().hex[:8], nx=True)
+        self.epoch = self._redis.get(f"{self.prefix}:epoch").decode()
+
+    def start(self, deliver):
+        super().start(deliver)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f"{self.prefix}:*")
+        threading.Thread(target=self._listen, args=(pubsub,), daemon=True).start()
+
+    def _listen(self, pubsub):
+        for raw in pubsub.listen():
+            try:
+                channel = raw["channel"].decode()[len(self.prefix) + 1:]
+                self.deliver(channel, json.loads(raw["data"]))
+            except Exception:
+                logger.exception("Dropped malformed event from redis")
+
+    def next_id(self):
+        return int(self._redis.incr(f"{self.prefix}:id"))
+
+    def publish(self, channel, message):
+        self._redis.publish(f"{self.prefix}:{channel}", json.dumps(message))
+
+
+# EVENT BROKER
+#
+# Pub/sub used to push changes to open Server-Sent Events streams. Every
+# subscriber gets a bounded queue; a client that stops reading loses its
+# oldest events instead of blocking publishers. The last few events of each
+# channel are kept so a reconnecting client can resume from Last-Event-ID.
+
+class EventBroker:
+
+    def __init__(self):
+        self.heartbeat = 15
+        self.queue_size = 100
+        self.history_size = 100
+        self.max_channels = 5000
+        self.backend = None
+        self._subscribers = {}
+        self._history = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, backend=None):
+        self.heartbeat = app.config.get("EVENT_STREAM_HEARTBEAT", self.heartbeat)
+        self.queue_size = app.config.get("EVENT_STREAM_QUEUE_SIZE", self.queue_size)
+        self.history_size = app.config.get("EVENT_STREAM_HISTORY", self.history_size)
+
+        if backend is None:
+            url = app.config.get("EVENT_BACKEND_URL")
+            backend = RedisBackend(url) if url else LocalBackend()
+
+        self.backend = backend
+        self.backend.start(self._deliver)
+        app.extensions["event_broker"] = self
+
+    def publish(self, channel, event, data):
+        if self.backend is None:
+            return None
+
+        seq = self.backend.next_id()
+        message = {"id": f"{self.backend.epoch}-{seq}", "seq": seq, "event": event, "data": data}
+        self.backend.publish(channel, message)
+        return message["id"]
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.history_size)
+                while len(self._history) > self.max_channels:
+                    self._history.popitem(last=False)
+            else:
+                self._history.move_to_end(channel)
+            history.append(message)
+
+            subscribers = list(self._subscribers.get(channel, ()))
+
+        for q in subscribers:
+            self._offer(q, message)
+
+    def _offer(self, q, message):
+        while True:
+            try:
+                q.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def subscribe(self, channels):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(q)
+        return q
+
+    def unsubscribe(self, channels, q):
+        with self._lock:
+            for channel in channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers:
+                    subscribers.discard(q)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def replay(self, channels, after):
+        """Buffered events numbered after `after`, oldest first."""
+        with self._lock:
+            missed = [
+                message
+                for channel in channels
+                for message in self._history.get(channel, ())
+                if message["seq"] > after
+            ]
+        return sorted(missed, key=lambda m: m["seq"])
+
+    def stream(self, channels, last_event_id=None):
+        """
+        Generator of SSE frames for `channels`, ends when the client leaves.
+
+        `last_event_id` is (epoch, n) from parse_last_event_id; one from
+        another epoch is ignored, its number means nothing to this counter.
+        """
+        channels = list(channels)
+        # Subscribe before replaying so nothing published in between is lost
+        q = self.subscribe(channels)
+        try:
+            yield f"retry: {self.heartbeat * 1000}\n\n"
+
+            seen = 0
+            if last_event_id is not None and last_event_id[0] == self.backend.epoch:
+                seen = last_event_id[1]
+                for message in self.replay(channels, seen):
+                    seen = message["seq"]
+                    yield format_sse(message)
+
+            while True:
+                try:
+                    message = q.get(timeout=self.heartbeat)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message["seq"] <= seen:
+                    continue
+                yield format_sse(message)
+        finally:
+            self.unsubscribe(channels, q)
+
+
+def parse_last_event_id(value):
+    """(epoch, n) from an "<epoch>-<n>" event id, None if missing or malformed."""
+    epoch, _, seq = (value or "").rpartition("-")
+    try:
+        return (epoch, int(seq)) if epoch else None
+    except ValueError:
+        return None
+
+
+def format_sse(message):
+    return (
+        f"id: {message['id']}\n"
+        f"event: {message['event']}\n"
+        f"data: {json.dumps(message['data'])}\n\n"
+    )
@@ -4,6 +4,11 @@ from flask_jwt_extended import JWTManager
 from flask_bcrypt import Bcrypt
 from sqlalchemy import MetaData
 
+from cache import CatalogCache
+from images import ImagePipeline
+from events import EventBroker
+from idempotency import IdempotencyStore
+
 metadata = MetaData(naming_convention={
     "ix": "ix_%(column_0_label)s",
     "uq": "uq_%(table_name)s_%(column_0_name)s",
@@ -15,4 +20,8 @@ metadata = MetaData(naming_convention={
 db = SQLAlchemy(metadata=metadata)
 migrate = Migrate()
 jwt = JWTManager()
-bcrypt = Bcrypt()
\ No newline at end of file
+bcrypt = Bcrypt()
+catalog_cache = CatalogCache()
+image_pipeline = ImagePipeline()
+event_broker = EventBroker()
+idempotency_store = IdempotencyStore()
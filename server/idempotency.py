@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# IDEMPOTENCY STORE
+#
+# Remembers the response of a keyed request for a while so a retried POST
+# gets the original answer instead of running the transaction again. While
+# the first request is still running, duplicates block on its entry.
+
+class _Entry:
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response = None
+        self.expires_at = None
+
+
+class IdempotencyStore:
+
+    def __init__(self):
+        self.ttl = 24 * 3600
+        self.wait_timeout = 30
+        self.maxsize = 10000
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get("IDEMPOTENCY_TTL", self.ttl)
+        self.wait_timeout = app.config.get("IDEMPOTENCY_WAIT_TIMEOUT", self.wait_timeout)
+        self.maxsize = app.config.get("IDEMPOTENCY_MAXSIZE", self.maxsize)
+        app.extensions["idempotency_store"] = self
+
+    def _evict(self, now):
+        # Finished entries expire after the TTL, the oldest go first when full
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry.expires_at is not None and entry.expires_at <= now
+        ]
+        for key in expired:
+            del self._entries[key]
+
+        while len(self._entries) > self.maxsize:
+            key, entry = next(iter(self._entries.items()))
+            if not entry.done.is_set():
+                break
+            del self._entries[key]
+
+    def begin(self, key, fingerprint):
+        """
+        Claim `key` for a new request.
+
+        Returns ("new", None) when the caller should run the request,
+        ("replay", response) for a finished duplicate, ("mismatch", None)
+        if the key was used for a different payload and ("busy", None) if
+        the original request is still running after the wait timeout.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = _Entry(fingerprint)
+                return "new", None
+
+        if entry.fingerprint != fingerprint:
+            return "mismatch", None
+
+        if not entry.done.wait(self.wait_timeout):
+            return "busy", None
+
+        if entry.response is None:
+            # The first attempt failed and was released, run it again
+            return self.begin(key, fingerprint)
+
+        return "replay", entry.response
+
+    def complete(self, key, response):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.response = response
+            entry.expires_at = time.monotonic() + self.ttl
+            entry.done.set()
+
+    def release(self, key):
+        """Forget a key whose request failed so a retry runs it again."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.done.set()
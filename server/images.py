@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # variants are skipped without Pillow
+    Image = None
+
+
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+# IMAGE PIPELINE
+#
+# Uploads are streamed to disk under their content hash, so identical files
+# are stored once and different files never overwrite each other. Resized
+# WebP variants are produced by a small worker pool after the response has
+# been sent. Only variants already on disk are advertised; callers pass
+# on_ready to hear when a batch is done (e.g. to drop cached listings).
+
+class ImagePipeline:
+
+    def __init__(self):
+        self.widths = (320, 640, 1280)
+        self.quality = 80
+        self.url_prefix = ""
+        self.folder = None
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.widths = tuple(app.config.get("IMAGE_VARIANT_WIDTHS", self.widths))
+        self.quality = app.config.get("IMAGE_WEBP_QUALITY", self.quality)
+        self.url_prefix = app.config.get("UPLOAD_URL_PREFIX", "").rstrip("/")
+        self.folder = os.path.join(app.root_path, "static", "uploads")
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get("IMAGE_WORKERS", 2),
+            thread_name_prefix="image-pipeline"
+        )
+        app.extensions["image_pipeline"] = self
+
+    @property
+    def enabled(self):
+        return Image is not None
+
+    def save_upload(self, file_storage, folder, on_ready=None):
+        """Stream an upload into `folder`, returning the stored filename."""
+        ext = os.path.splitext(secure_filename(file_storage.filename or ""))[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            raise ValueError("Unsupported image type")
+
+        os.makedirs(folder, exist_ok=True)
+        digest = hashlib.sha256()
+
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                while True:
+                    chunk = file_storage.stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+
+            filename = digest.hexdigest()[:32] + ext
+            path = os.path.join(folder, filename)
+
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.submit(path, on_ready)
+        return filename
+
+    def url(self, filename):
+        return f"{self.url_prefix}/{filename}"
+
+    def variant_name(self, filename, width):
+        return f"{os.path.splitext(filename)[0]}_{width}.webp"
+
+    def variant_urls(self, filename):
+        """URLs of the variants of `filename` that have been written so far."""
+        if not self.enabled or self.folder is None:
+            return {}
+        return {
+            str(width): self.url(self.variant_name(filename, width))
+            for width in self.widths
+            if os.path.exists(os.path.join(self.folder, self.variant_name(filename, width)))
+        }
+
+    def variants_for(self, image_url):
+        """Variant URLs for a stored image URL, {} for images we did not upload."""
+        prefix = self.url_prefix + "/"
+        if not image_url or not image_url.startswith(prefix):
+            return {}
+        return self.variant_urls(image_url[len(prefix):])
+
+    def submit(self, path, on_ready=None):
+        if not self.enabled or self._executor is None:
+            return
+
+        with self._lock:
+            callbacks = self._pending.get(path)
+            if callbacks is not None:
+                # Already being built, just hear about it too
+                if on_ready:
+                    callbacks.append(on_ready)
+                return
+            self._pending[path] = [on_ready] if on_ready else []
+
+        self._executor.submit(self._make_variants, path)
+
+    def _make_variants(self, path):
+        folder, filename = os.path.split(path)
+        try:
+            targets = [
+                (width, os.path.join(folder, self.variant_name(filename, width)))
+                for width in self.widths
+            ]
+            targets = [(w, p) for w, p in targets if not os.path.exists(p)]
+            if not targets:
+                return
+
+            with Image.open(path) as source:
+                source = ImageOps.exif_transpose(source)
+                if source.mode not in ("RGB", "RGBA"):
+                    source = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+                for width, target in targets:
+                    variant = source.copy()
+                    # Never upscales: small originals keep their size
+                    variant.thumbnail((width, width * 4))
+                    tmp_path = target + ".part"
+                    variant.save(tmp_path, "WEBP", quality=self.quality, method=4)
+                    os.replace(tmp_path, target)
+        except Exception:
+            # A broken image keeps its original URL, variants stay missing
+            logger.exception("Could not build image variants for %s", path)
+        finally:
+            with self._lock:
+                callbacks = self._pending.pop(path, [])
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Image variant callback failed for %s", path)
@@ -0,0 +1,110 @@
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import update
+
+from extensions import db
+from models import OrderIntent
+from ordering import OrderError, place_order, order_placed
+
+
+logger = logging.getLogger(__name__)
+
+
+# ASYNC ORDER INTAKE
+#
+# In intake mode the request only stores the order body as an OrderIntent
+# and answers 202; a small worker pool turns intents into orders with the
+# same place_order used by the synchronous path. Queued work is capped:
+# once `capacity` intents are waiting or running, new ones are refused so
+# the caller can back off instead of piling up behind the kitchen rush.
+
+class OrderIntake:
+
+    def __init__(self):
+        self.enabled = False
+        self.workers = 4
+        self.capacity = 64
+        self.retry_after = 2
+        self.app = None
+        self._executor = None
+        self._slots = None
+
+    def init_app(self, app):
+        self.enabled = app.config.get("ORDER_INTAKE_ASYNC", self.enabled)
+        self.workers = app.config.get("ORDER_INTAKE_WORKERS", self.workers)
+        self.capacity = max(app.config.get("ORDER_INTAKE_CAPACITY", self.capacity), self.workers)
+        self.retry_after = app.config.get("ORDER_INTAKE_RETRY_AFTER", self.retry_after)
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="order-intake"
+        )
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        app.extensions["order_intake"] = self
+
+    def reserve(self):
+        """Take a queue slot, False when the intake is full."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def submit(self, intent_id):
+        """Finalize a stored intent in the pool, using a slot from reserve()."""
+        future = self._executor.submit(self._run, intent_id)
+        future.add_done_callback(lambda _: self.release())
+
+    def _run(self, intent_id):
+        with self.app.app_context():
+            try:
+                self.finalize(intent_id)
+            except Exception:
+                logger.exception("Order intent %s could not be finalized", intent_id)
+            finally:
+                db.session.remove()
+
+    def finalize(self, intent_id):
+        """Turn one queued intent into an order, returns the intent's final status."""
+        # Claim it first so a sweep and a worker never place the same order
+        claimed = db.session.execute(
+            update(OrderIntent)
+            .where(OrderIntent.id == intent_id, OrderIntent.status == "queued")
+            .values(status="processing")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            return None
+
+        intent = OrderIntent.query.get(intent_id)
+
+        try:
+            order, prep = place_order(intent.customer_id, json.loads(intent.payload))
+        except OrderError as e:
+            db.session.rollback()
+            intent.status = "failed"
+            intent.error = e.message
+            intent.error_status = e.status
+            db.session.commit()
+            return intent.status
+        except Exception:
+            db.session.rollback()
+            intent.status = "failed"
+            intent.error = "Order could not be placed"
+            intent.error_status = 500
+            db.session.commit()
+            raise
+
+        # The intent completes in the same transaction as its order
+        intent.status = "completed"
+        intent.order_id = order.id
+        db.session.commit()
+
+        order_placed(order, prep)
+        return intent.status
+
+
+order_intake = OrderIntake()
@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from extensions import db
+from models import Order, OrderItem, MenuItem
+
+
+ACTIVE_STATUSES = ("pending", "preparing")
+
+
+# KITCHEN QUEUE MODEL
+#
+# Each outlet's kitchen is a FIFO of active tickets worked by a few parallel
+# stations. Two running totals describe it: minutes of work ever enqueued
+# and minutes of work finished. A ticket remembers how much work was queued
+# ahead of it, so "work still ahead of me" is one subtraction and every
+# create / status change / estimate is O(1).
+
+class _Ticket:
+
+    __slots__ = ("order_id", "customer_id", "prep", "ahead_mark", "started_at")
+
+    def __init__(self, order_id, customer_id, prep, ahead_mark):
+        self.order_id = order_id
+        self.customer_id = customer_id
+        self.prep = prep
+        self.ahead_mark = ahead_mark
+        self.started_at = None
+
+
+class KitchenQueue:
+
+    def __init__(self, stations, buffer):
+        self.stations = stations
+        self.buffer = buffer
+        self.tickets = {}
+        self.enqueued = 0.0
+        self.completed = 0.0
+        self.loaded_at = time.time()
+
+    def backlog(self):
+        return max(self.enqueued - self.completed, 0.0)
+
+    def quote(self, prep):
+        return math.ceil(self.backlog() / self.stations + prep + self.buffer)
+
+    def add(self, order_id, customer_id, prep):
+        ticket = _Ticket(order_id, customer_id, prep, self.enqueued)
+        self.tickets[order_id] = ticket
+        self.enqueued += prep
+        return ticket
+
+    def start(self, order_id, now):
+        ticket = self.tickets.get(order_id)
+        if ticket and ticket.started_at is None:
+            ticket.started_at = now
+
+    def remove(self, order_id):
+        ticket = self.tickets.pop(order_id, None)
+        if ticket:
+            self.completed += ticket.prep
+
+    def estimate(self, order_id, now):
+        ticket = self.tickets.get(order_id)
+        if ticket is None:
+            return None
+
+        if ticket.started_at is not None:
+            ahead = 0.0
+            own = max(ticket.prep - (now - ticket.started_at) / 60, 0.0)
+        else:
+            ahead = max(ticket.ahead_mark - self.completed, 0.0)
+            own = ticket.prep
+
+        return math.ceil(ahead / self.stations + own + self.buffer)
+
+
+class KitchenBoard:
+    """Per-outlet kitchen queues, loaded lazily and resynced from the database."""
+
+    def __init__(self):
+        self.stations = 2
+        self.buffer = 12
+        self.resync_seconds = 60
+        self._queues = {}
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.stations = max(app.config.get("KITCHEN_STATIONS", self.stations), 1)
+        self.buffer = app.config.get("KITCHEN_BUFFER_MINUTES", self.buffer)
+        self.resync_seconds = app.config.get("KITCHEN_RESYNC_SECONDS", self.resync_seconds)
+        app.extensions["kitchen_board"] = self
+
+    def _queue(self, outlet_id):
+        queue = self._queues.get(outlet_id)
+        # Other workers see other orders: rebuild from the table now and then
+        if queue is None or time.time() - queue.loaded_at > self.resync_seconds:
+            queue = self._load(outlet_id)
+        return queue
+
+    def _load(self, outlet_id):
+        rows = (
+            db.session.query(
+                Order.id,
+                Order.customer_id,
+                Order.status,
+                func.max(MenuItem.preparation_time)
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+            .filter(Order.outlet_id == outlet_id, Order.status.in_(ACTIVE_STATUSES))
+            .group_by(Order.id, Order.customer_id, Order.status, Order.created_at)
+            .order_by(Order.created_at, Order.id)
+            .all()
+        )
+
+        queue = KitchenQueue(self.stations, self.buffer)
+        now = time.time()
+
+        with self._lock:
+            old = self._queues.get(outlet_id)
+
+            for order_id, customer_id, status, prep in rows:
+                queue.add(order_id, customer_id, prep or 0)
+                if status == "preparing":
+                    # Keep the cooking clock of tickets we already saw start,
+                    # otherwise every resync would restart it
+                    previous = old.tickets.get(order_id) if old is not None else None
+                    started_at = previous.started_at if previous is not None else None
+                    queue.start(order_id, started_at or now)
+
+            if old is not None:
+                for order_id in old.tickets:
+                    self._owners.pop(order_id, None)
+            for order_id in queue.tickets:
+                self._owners[order_id] = outlet_id
+            self._queues[outlet_id] = queue
+
+        return queue
+
+    def quote(self, outlet_id, prep):
+        """Minutes until a new order with `prep` minutes of cooking is ready."""
+        queue = self._queue(outlet_id)
+        with self._lock:
+            return queue.quote(prep)
+
+    def add(self, order, prep):
+        queue = self._queue(order.outlet_id)
+        with self._lock:
+            if order.id not in queue.tickets:
+                queue.add(order.id, order.customer_id, prep)
+                self._owners[order.id] = order.outlet_id
+
+    def update(self, order_id, outlet_id, status):
+        queue = self._queue(outlet_id)
+        with self._lock:
+            if status == "preparing":
+                queue.start(order_id, time.time())
+            elif status not in ACTIVE_STATUSES:
+                queue.remove(order_id)
+                self._owners.pop(order_id, None)
+
+    def estimate(self, order_id, outlet_id=None):
+        """Live minutes-to-ready for an active order, None if not queued."""
+        outlet_id = outlet_id or self._owners.get(order_id)
+        if outlet_id is None:
+            return None
+        queue = self._queue(outlet_id)
+        with self._lock:
+            return queue.estimate(order_id, time.time())
+
+    def active_estimate(self, order_id, outlet_id):
+        """
+        Minutes-to-ready for an order the database lists as pending / preparing.
+
+        An order placed through another worker since the last resync is not in
+        this worker's queue yet: reload the outlet once, and if the order is
+        still missing, age the quote stored on the order row instead.
+        """
+        minutes = self.estimate(order_id, outlet_id)
+        if minutes is not None:
+            return minutes
+
+        self._load(outlet_id)
+        minutes = self.estimate(order_id, outlet_id)
+        if minutes is not None:
+            return minutes
+
+        quoted, created_at = db.session.query(Order.time_till_ready, Order.created_at)\
+            .filter(Order.id == order_id).one()
+        elapsed = (datetime.utcnow() - created_at).total_seconds() / 60 if created_at else 0
+        return max(math.ceil((quoted or 0) - elapsed), self.buffer)
+
+    def lookup(self, order_id):
+        """Queue view of an order this worker already tracks, without a query."""
+        with self._lock:
+            outlet_id = self._owners.get(order_id)
+            queue = self._queues.get(outlet_id)
+            ticket = queue.tickets.get(order_id) if queue else None
+            if ticket is None:
+                return None
+            return {
+                "outlet_id": outlet_id,
+                "customer_id": ticket.customer_id,
+                "status": "preparing" if ticket.started_at is not None else "pending"
+            }
+
+
+def ready_at(minutes):
+    return (datetime.utcnow() + timedelta(minutes=minutes)).isoformat()
+
+
+kitchen_board = KitchenBoard()
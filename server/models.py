@@ -106,7 +106,14 @@ class Outlet(db.Model, SerializerMixin):
 
 class MenuItem(db.Model, SerializerMixin):
     __tablename__ = "menu_items"
-    serialize_rules = ("-outlet.menu_items", "-order_items.menu_item")
+    serialize_rules = ("-outlet.menu_items", "-order_items.menu_item", "-sales.menu_item")
+    __table_args__ = (
+        # keyset pagination on (outlet_id, id) plus the common listing filters
+        db.Index("ix_menu_items_outlet_id_id", "outlet_id", "id"),
+        db.Index("ix_menu_items_category_outlet_id", "category", "outlet_id", "id"),
+        db.Index("ix_menu_items_is_available_outlet_id", "is_available", "outlet_id", "id"),
+        db.Index("ix_menu_items_outlet_id_price", "outlet_id", "price"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     item_name = db.Column(db.String(100), nullable=False)
@@ -122,6 +129,8 @@ class MenuItem(db.Model, SerializerMixin):
     # relationships
     outlet = db.relationship("Outlet", back_populates="menu_items")
     order_items = db.relationship("OrderItem", back_populates="menu_item", cascade="all, delete-orphan")
+    sales = db.relationship("MenuItemSales", back_populates="menu_item", uselist=False, cascade="all, delete-orphan")
+    daily_sales = db.relationship("MenuItemDailySales", cascade="all, delete-orphan")
     
     @validates("item_name")
     def validate_item_name(self, key, value):
@@ -155,6 +164,11 @@ class FoodCourtTable(db.Model, SerializerMixin):
 class Reservation(db.Model, SerializerMixin):
     __tablename__ = "reservations"
     serialize_rules = ("-customer.reservations", "-table.reservations", "-orders.reservation")
+    __table_args__ = (
+        # outlet dashboard / customer history listings, newest first
+        db.Index("ix_reservations_outlet_id_time_reserved_for", "outlet_id", "time_reserved_for"),
+        db.Index("ix_reservations_customer_id_time_reserved_for", "customer_id", "time_reserved_for"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey("customers.id"), nullable=False)
@@ -183,9 +197,16 @@ class Reservation(db.Model, SerializerMixin):
 class Order(db.Model, SerializerMixin):
     __tablename__ = "orders"
     serialize_rules = ("-reservation.orders", "-order_items.order")
+    __table_args__ = (
+        # outlet dashboards and analytics: one range scan per outlet
+        db.Index("ix_orders_outlet_id_created_at", "outlet_id", "created_at"),
+        db.Index("ix_orders_customer_id_created_at", "customer_id", "created_at"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     customer_id = db.Column(db.Integer, db.ForeignKey("customers.id"), nullable=False)
+    # denormalized from the order's menu items (orders never span outlets)
+    outlet_id = db.Column(db.Integer, db.ForeignKey("outlets.id"))
     reservation_id = db.Column(db.Integer, db.ForeignKey("reservations.id"))
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     discount_amount = db.Column(db.Numeric(10, 2), default=0.00)
@@ -203,6 +224,30 @@ class Order(db.Model, SerializerMixin):
         return f"<Order id={self.id} total={self.total_amount} status={self.status}>"
 
 
+class OrderIntent(db.Model, SerializerMixin):
+    __tablename__ = "order_intents"
+    __table_args__ = (
+        # sweeping intents left behind by a worker that died
+        db.Index("ix_order_intents_status_created_at", "status", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    customer_id = db.Column(db.Integer, db.ForeignKey("customers.id"), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # the order request body as JSON
+    status = db.Column(db.String(20), nullable=False, default="queued") # queued, processing, completed, failed
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"))
+    error = db.Column(db.String(255))
+    error_status = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # relationships
+    order = db.relationship("Order")
+
+    def __repr__(self):
+        return f"<OrderIntent id={self.id} status={self.status} order_id={self.order_id}>"
+
+
 class OrderItem(db.Model, SerializerMixin):
     __tablename__ = "order_items"
     serialize_rules = ("-order.order_items", "-menu_item.order_items")
@@ -219,3 +264,81 @@ class OrderItem(db.Model, SerializerMixin):
     
     def __repr__(self):
         return f"<OrderItem id={self.id} order_id={self.order_id} qty={self.quantity}>"
+
+
+# ORDER ARCHIVE
+# Finished orders past ORDER_ARCHIVE_AFTER_DAYS are moved here by
+# `flask archive-orders`; same columns as orders / order_items, ids kept.
+# No foreign keys out of the archive so history never blocks deletes.
+
+class ArchivedOrder(db.Model, SerializerMixin):
+    __tablename__ = "orders_archive"
+    __table_args__ = (
+        db.Index("ix_orders_archive_outlet_id_created_at", "outlet_id", "created_at"),
+        db.Index("ix_orders_archive_customer_id_created_at", "customer_id", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    customer_id = db.Column(db.Integer, nullable=False)
+    outlet_id = db.Column(db.Integer)
+    reservation_id = db.Column(db.Integer)
+    total_amount = db.Column(db.Numeric(10, 2), nullable=False)
+    discount_amount = db.Column(db.Numeric(10, 2), default=0.00)
+    status = db.Column(db.String(20), nullable=False)
+    order_type = db.Column(db.String(20))
+    table_number = db.Column(db.String(10), nullable=False)
+    time_till_ready = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f"<ArchivedOrder id={self.id} total={self.total_amount} status={self.status}>"
+
+
+class ArchivedOrderItem(db.Model, SerializerMixin):
+    __tablename__ = "order_items_archive"
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders_archive.id"), nullable=False, index=True)
+    menu_item_id = db.Column(db.Integer, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Numeric(10, 2), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedOrderItem id={self.id} order_id={self.order_id} qty={self.quantity}>"
+
+
+# Sales counters, maintained by create_order in the same transaction as the
+# order lines so best sellers never have to aggregate order_items.
+class MenuItemSales(db.Model, SerializerMixin):
+    __tablename__ = "menu_item_sales"
+    serialize_rules = ("-menu_item.sales",)
+    __table_args__ = (
+        db.Index("ix_menu_item_sales_order_count", "order_count", "menu_item_id"),
+    )
+    
+    menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_items.id"), primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity_sold = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # relationships
+    menu_item = db.relationship("MenuItem", back_populates="sales")
+    
+    def __repr__(self):
+        return f"<MenuItemSales menu_item_id={self.menu_item_id} orders={self.order_count}>"
+
+
+class MenuItemDailySales(db.Model, SerializerMixin):
+    __tablename__ = "menu_item_daily_sales"
+    __table_args__ = (
+        db.Index("ix_menu_item_daily_sales_day", "day", "menu_item_id"),
+    )
+    
+    menu_item_id = db.Column(db.Integer, db.ForeignKey("menu_items.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    quantity_sold = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<MenuItemDailySales menu_item_id={self.menu_item_id} day={self.day}>"
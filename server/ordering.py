@@ -0,0 +1,281 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from extensions import db, event_broker
+from models import Order, OrderItem, MenuItem, Outlet, Reservation
+from kitchen import kitchen_board
+from sales import record_sales
+
+
+# ORDER PLACEMENT
+#
+# Validation, pricing, the reservation discount and the inserts for one
+# order, shared by the synchronous endpoint, the async intake workers and
+# the multi-outlet checkout. place_order / place_checkout only flush; the
+# caller commits (together with whatever bookkeeping it needs) and then
+# calls order_placed for every order. Kitchen minutes are worked out before
+# the commit, which expires the menu items the lines point at.
+
+class OrderError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def place_order(customer_id, data):
+    """Add a new order for `data` to the session, returns (order, prep minutes)."""
+    items = data.get("items") or data.get("order_items")
+    outlet_id = data.get("outlet_id")
+
+    if not outlet_id or not items:
+        raise OrderError("outlet_id and items are required")
+
+    if not isinstance(items, list):
+        raise OrderError("items must be a list")
+
+    # Validate outlet
+    outlet = Outlet.query.get(outlet_id)
+    if not outlet:
+        raise OrderError("Outlet not found", 404)
+
+    # Validate reservation (optional)
+    reservation = _load_reservation(customer_id, data.get("reservation_id"))
+
+    # Check for reservation discount
+    if reservation:
+        target_res = reservation
+    else:
+        # Auto-find a confirmed reservation for today
+        target_res = _open_reservations(customer_id, [outlet.id]).get(outlet.id)
+
+    # New fields
+    order_type = data.get("order_type", "dine-in")
+    table_number = data.get("table_number")
+
+    if not table_number:
+        raise OrderError("Table number is required")
+
+    # Resolve every line with one query
+    lines = resolve_order_lines(items, outlet.id)
+
+    return _add_order(customer_id, outlet.id, lines, target_res, order_type, table_number)
+
+
+def place_checkout(customer_id, data):
+    """
+    Add one order per outlet for a cart spanning several outlets.
+
+    Every line is resolved with one menu query and the open reservations of
+    all outlets with one more. Returns [(order, prep minutes)] in cart order; the
+    caller commits them together.
+    """
+    items = data.get("items") or data.get("order_items")
+
+    if not items:
+        raise OrderError("items are required")
+
+    if not isinstance(items, list):
+        raise OrderError("items must be a list")
+
+    reservation = _load_reservation(customer_id, data.get("reservation_id"))
+
+    order_type = data.get("order_type", "dine-in")
+    table_number = data.get("table_number")
+
+    if not table_number:
+        raise OrderError("Table number is required")
+
+    by_outlet = {}
+    for menu_item, quantity in resolve_order_lines(items):
+        by_outlet.setdefault(menu_item.outlet_id, []).append((menu_item, quantity))
+
+    # A given reservation pays off its own outlet's order (or the first one
+    # if that outlet is not in the cart); other outlets use today's bookings
+    discounts = _open_reservations(customer_id, list(by_outlet))
+    if reservation:
+        discounts.pop(reservation.outlet_id, None)
+        target = reservation.outlet_id if reservation.outlet_id in by_outlet else next(iter(by_outlet))
+        discounts[target] = reservation
+
+    return [
+        _add_order(customer_id, outlet_id, lines, discounts.get(outlet_id), order_type, table_number)
+        for outlet_id, lines in by_outlet.items()
+    ]
+
+
+def _load_reservation(customer_id, reservation_id):
+    if not reservation_id:
+        return None
+
+    reservation = Reservation.query.get(reservation_id)
+
+    if not reservation:
+        raise OrderError("Invalid reservation")
+
+    if reservation.customer_id != customer_id:
+        raise OrderError("Unauthorized reservation", 403)
+
+    if reservation.status != "confirmed":
+        raise OrderError("Reservation not confirmed")
+
+    return reservation
+
+
+def _open_reservations(customer_id, outlet_ids):
+    """Today's confirmed, not yet deducted reservation per outlet."""
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    reservations = Reservation.query.filter(
+        Reservation.customer_id == customer_id,
+        Reservation.outlet_id.in_(outlet_ids),
+        Reservation.status == "confirmed",
+        Reservation.time_reserved_for >= today_start,
+        Reservation.is_fee_deducted == False
+    ).order_by(Reservation.id).all()
+
+    found = {}
+    for reservation in reservations:
+        found.setdefault(reservation.outlet_id, reservation)
+    return found
+
+
+def _add_order(customer_id, outlet_id, lines, target_res, order_type, table_number):
+    prep = prep_minutes(lines)
+
+    discount_amount = Decimal("0.00")
+    reservation_id = None
+    if target_res:
+        discount_amount = Decimal("500.00")
+        reservation_id = target_res.id
+
+    total_amount = sum(
+        (Decimal(menu_item.price) * quantity for menu_item, quantity in lines),
+        Decimal("0.00")
+    )
+
+    # Final logic for total and deduction
+    if total_amount < discount_amount:
+        discount_amount = total_amount # Can't deduct more than total
+
+    order = Order(
+        customer_id=customer_id,
+        outlet_id=outlet_id,
+        reservation_id=reservation_id,
+        status="pending",
+        total_amount=total_amount - discount_amount,
+        discount_amount=discount_amount,
+        order_type=order_type,
+        table_number=table_number,
+        time_till_ready=kitchen_board.quote(outlet_id, prep)
+    )
+
+    db.session.add(order)
+    db.session.flush()  # Get order.id
+
+    db.session.execute(insert(OrderItem), [
+        {
+            "order_id": order.id,
+            "menu_item_id": menu_item.id,
+            "quantity": quantity,
+            "price": menu_item.price
+        }
+        for menu_item, quantity in lines
+    ])
+
+    if target_res and discount_amount > 0:
+        target_res.is_fee_deducted = True
+
+    record_sales(
+        [(menu_item.id, quantity) for menu_item, quantity in lines],
+        order.created_at
+    )
+
+    return order, prep
+
+
+def order_placed(order, prep):
+    """Post-commit side effects: queue the ticket and notify listeners."""
+    kitchen_board.add(order, prep)
+    publish_order_event("order_created", order)
+
+
+def resolve_order_lines(items, outlet_id=None):
+    """Validate cart lines against a single batched menu lookup."""
+    parsed = []
+    for item in items:
+
+        if not isinstance(item, dict) or "menu_item_id" not in item:
+            raise OrderError("menu_item_id is required")
+
+        try:
+            menu_item_id = int(item["menu_item_id"])
+        except (TypeError, ValueError):
+            raise OrderError("Invalid menu_item_id")
+
+        try:
+            quantity = int(item.get("quantity", 1))
+        except (TypeError, ValueError):
+            raise OrderError("Invalid quantity")
+
+        parsed.append((menu_item_id, quantity))
+
+    ids = {menu_item_id for menu_item_id, _ in parsed}
+    menu_items = {
+        m.id: m for m in MenuItem.query.filter(MenuItem.id.in_(ids)).all()
+    }
+
+    lines = []
+    for menu_item_id, quantity in parsed:
+
+        menu_item = menu_items.get(menu_item_id)
+
+        if not menu_item:
+            raise OrderError("Menu item not found", 404)
+
+        if outlet_id is not None and menu_item.outlet_id != outlet_id:
+            raise OrderError("Invalid menu item")
+
+        if not menu_item.is_available:
+            raise OrderError("Item unavailable")
+
+        if quantity < 1:
+            raise OrderError("Invalid quantity")
+
+        lines.append((menu_item, quantity))
+
+    return lines
+
+
+def prep_minutes(lines):
+    # Lines cook in parallel, the slowest item sets the order's kitchen time.
+    # The queue ahead and the handover buffer are added by the kitchen board.
+    return max((menu_item.preparation_time or 0 for menu_item, _ in lines), default=0)
+
+
+def order_summary(order):
+    return {
+        "order_id": order.id,
+        "status": order.status,
+        "total_amount": float(order.total_amount),
+        "time_till_ready": order.time_till_ready
+    }
+
+
+def publish_order_event(event, order):
+    payload = {
+        "order_id": order.id,
+        "customer_id": order.customer_id,
+        "outlet_id": order.outlet_id,
+        "status": order.status,
+        "order_type": order.order_type,
+        "table_number": order.table_number,
+        "total_amount": float(order.total_amount),
+        "time_till_ready": order.time_till_ready,
+        "created_at": order.created_at.isoformat() if order.created_at else None
+    }
+    event_broker.publish(f"customer:{order.customer_id}", event, payload)
+    if order.outlet_id:
+        event_broker.publish(f"outlet:{order.outlet_id}", event, payload)
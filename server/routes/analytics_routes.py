@@ -1,52 +1,44 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from extensions import db
-from models import Outlet, Order, OrderItem, MenuItem
+from models import Outlet, MenuItem
 from sqlalchemy import func
 from datetime import datetime, timedelta
+from archive import order_history, order_item_history
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
+# Reports read live and archived orders through one UNION ALL; both halves
+# are range scans on their (outlet_id, created_at) index. Revenue is the
+# pre-discount order value (total_amount + discount_amount), i.e. the sum
+# of the order's lines.
+orders = order_history()
+order_items = order_item_history()
+order_revenue = func.sum(orders.c.total_amount + func.coalesce(orders.c.discount_amount, 0))
+
+
 @analytics_bp.route('/overview', methods=['GET'])
 @jwt_required()
 def get_overview():
     outlet_id = get_jwt_identity().get('id')
     
-    # Get all orders for this outlet through menu items
-    total_orders = db.session.query(func.count(func.distinct(Order.id)))\
-        .join(OrderItem, Order.id == OrderItem.order_id)\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .scalar()
-    
-    # Get total revenue
-    total_revenue = db.session.query(func.sum(OrderItem.price * OrderItem.quantity))\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .scalar() or 0
+    # Get all orders and total revenue for this outlet
+    total_orders, total_revenue = db.session.query(func.count(orders.c.id), order_revenue)\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .one()
     
-    # Get today's orders
+    # Get today's orders and revenue
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    orders_today = db.session.query(func.count(func.distinct(Order.id)))\
-        .join(OrderItem, Order.id == OrderItem.order_id)\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .filter(Order.created_at >= today_start)\
-        .scalar()
-    
-    # Get today's revenue
-    revenue_today = db.session.query(func.sum(OrderItem.price * OrderItem.quantity))\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .join(Order, OrderItem.order_id == Order.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .filter(Order.created_at >= today_start)\
-        .scalar() or 0
+    orders_today, revenue_today = db.session.query(func.count(orders.c.id), order_revenue)\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .filter(orders.c.created_at >= today_start)\
+        .one()
     
     return jsonify({
         'total_orders': total_orders or 0,
-        'total_revenue': float(total_revenue),
+        'total_revenue': float(total_revenue or 0),
         'orders_today': orders_today or 0,
-        'revenue_today': float(revenue_today)
+        'revenue_today': float(revenue_today or 0)
     }), 200
 
 
@@ -56,11 +48,9 @@ def get_order_status_breakdown():
     outlet_id = get_jwt_identity().get('id')
     
     # Get order counts by status
-    status_counts = db.session.query(Order.status, func.count(func.distinct(Order.id)))\
-        .join(OrderItem, Order.id == OrderItem.order_id)\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .group_by(Order.status)\
+    status_counts = db.session.query(orders.c.status, func.count(orders.c.id))\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .group_by(orders.c.status)\
         .all()
     
     # Format the response
@@ -81,13 +71,13 @@ def get_popular_items():
     # Get top 10 menu items by quantity sold
     popular_items = db.session.query(
         MenuItem.item_name,
-        func.sum(OrderItem.quantity).label('total_quantity'),
-        func.sum(OrderItem.price * OrderItem.quantity).label('total_revenue')
+        func.sum(order_items.c.quantity).label('total_quantity'),
+        func.sum(order_items.c.price * order_items.c.quantity).label('total_revenue')
     )\
-        .join(OrderItem, MenuItem.id == OrderItem.menu_item_id)\
+        .join(order_items, MenuItem.id == order_items.c.menu_item_id)\
         .filter(MenuItem.outlet_id == outlet_id)\
         .group_by(MenuItem.id, MenuItem.item_name)\
-        .order_by(func.sum(OrderItem.quantity).desc())\
+        .order_by(func.sum(order_items.c.quantity).desc())\
         .limit(10)\
         .all()
     
@@ -108,23 +98,24 @@ def get_popular_items():
 def get_daily_revenue():
     outlet_id = get_jwt_identity().get('id')
     
-    # Get revenue for last 7 days
+    # Get revenue for last 7 days in one grouped query
+    first_day = (datetime.utcnow() - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+    day = func.date(orders.c.created_at)
+    
+    totals = db.session.query(day, order_revenue)\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .filter(orders.c.created_at >= first_day)\
+        .group_by(day)\
+        .all()
+    by_day = {str(d): revenue for d, revenue in totals}
+    
     daily_revenue = []
-    for i in range(6, -1, -1):
-        day_start = (datetime.utcnow() - timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-        day_end = day_start + timedelta(days=1)
-        
-        revenue = db.session.query(func.sum(OrderItem.price * OrderItem.quantity))\
-            .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-            .join(Order, OrderItem.order_id == Order.id)\
-            .filter(MenuItem.outlet_id == outlet_id)\
-            .filter(Order.created_at >= day_start)\
-            .filter(Order.created_at < day_end)\
-            .scalar() or 0
-        
+    for i in range(7):
+        day_start = first_day + timedelta(days=i)
+        key = day_start.strftime('%Y-%m-%d')
         daily_revenue.append({
-            'date': day_start.strftime('%Y-%m-%d'),
-            'revenue': float(revenue)
+            'date': key,
+            'revenue': float(by_day.get(key) or 0)
         })
     
     return jsonify({'daily_revenue': daily_revenue}), 200
@@ -137,22 +128,18 @@ def get_weekly_revenue():
     
     # Current week (last 7 days)
     current_week_start = datetime.utcnow() - timedelta(days=7)
-    current_week_revenue = db.session.query(func.sum(OrderItem.price * OrderItem.quantity))\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .join(Order, OrderItem.order_id == Order.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .filter(Order.created_at >= current_week_start)\
+    current_week_revenue = db.session.query(order_revenue)\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .filter(orders.c.created_at >= current_week_start)\
         .scalar() or 0
     
     # Previous week (8-14 days ago)
     previous_week_start = datetime.utcnow() - timedelta(days=14)
     previous_week_end = datetime.utcnow() - timedelta(days=7)
-    previous_week_revenue = db.session.query(func.sum(OrderItem.price * OrderItem.quantity))\
-        .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
-        .join(Order, OrderItem.order_id == Order.id)\
-        .filter(MenuItem.outlet_id == outlet_id)\
-        .filter(Order.created_at >= previous_week_start)\
-        .filter(Order.created_at < previous_week_end)\
+    previous_week_revenue = db.session.query(order_revenue)\
+        .filter(orders.c.outlet_id == outlet_id)\
+        .filter(orders.c.created_at >= previous_week_start)\
+        .filter(orders.c.created_at < previous_week_end)\
         .scalar() or 0
     
     # Calculate growth
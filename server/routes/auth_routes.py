@@ -7,7 +7,7 @@ from flask_jwt_extended import (
     unset_jwt_cookies
 )
 
-from extensions import db, bcrypt
+from extensions import db, bcrypt, catalog_cache
 from models import Customer, Outlet
 
 from utils import (
@@ -124,6 +124,7 @@ def outlet_register():
 
     db.session.add(new_outlet)
     db.session.commit()
+    catalog_cache.invalidate_outlets(new_outlet.id)
 
     access_token = create_access_token(
         identity={
@@ -1,12 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import func
+from sqlalchemy import func, tuple_, insert, update, case, or_
+from sqlalchemy.orm import joinedload, selectinload
+from urllib.parse import urlencode
+import csv
+import io
 import random
 
-from extensions import db
-from models import MenuItem, Outlet, OrderItem
+from extensions import db, catalog_cache, image_pipeline, event_broker
+from models import MenuItem, Outlet
 
-from utils import outlet_required
+from utils import outlet_required, catalog_etag, encode_cursor, decode_cursor
+from search import search_index
+from sales import top_sellers
+from events import parse_last_event_id
 
 
 menu_bp = Blueprint("menu", __name__)
@@ -14,73 +21,315 @@ menu_bp = Blueprint("menu", __name__)
 
 # GET ALL OUTLETS (PUBLIC)
 @menu_bp.route("/outlets", methods=["GET"])
+@catalog_etag(["outlets"])
 def get_all_outlets():
+    return jsonify(catalog_cache.get_or_set("outlets", "outlets", _load_outlets)), 200
+
+
+def _load_outlets():
     outlets = Outlet.query.filter_by(is_active=True).all()
-    return jsonify([
-        {
-            "id": o.id,
-            "outlet_name": o.outlet_name,
-            "cuisine_type": o.cuisine_type,
-            "description": o.description,
-            "image_url": getattr(o, "image_url", None) or "https://images.unsplash.com/photo-1552566626-52f8b828add9?q=80&w=1000",
-            "is_active": o.is_active
-        }
-        for o in outlets
-    ]), 200
+    return [_outlet_dict(o) for o in outlets]
+
+
+def _outlet_dict(o):
+    return {
+        "id": o.id,
+        "outlet_name": o.outlet_name,
+        "cuisine_type": o.cuisine_type,
+        "description": o.description,
+        "image_url": getattr(o, "image_url", None) or "https://images.unsplash.com/photo-1552566626-52f8b828add9?q=80&w=1000",
+        "is_active": o.is_active
+    }
+
+
+# MARKETPLACE BOOTSTRAP (PUBLIC)
+# Outlets with their categories and available items, plus best sellers, in
+# one response built from a fixed number of queries and cached as a unit.
+@menu_bp.route("/marketplace", methods=["GET"])
+def get_marketplace():
+    marketplace = catalog_cache.get_or_set(
+        ["outlets", "menu"], "marketplace", _load_marketplace, ttl=BEST_SELLERS_TTL
+    )
+    return jsonify(marketplace), 200
+
+
+def _load_marketplace():
+    outlets = (
+        Outlet.query
+        .filter_by(is_active=True)
+        .options(selectinload(Outlet.menu_items.and_(MenuItem.is_available == True)))
+        .order_by(Outlet.id)
+        .all()
+    )
+
+    result = []
+    for o in outlets:
+        items = sorted(o.menu_items, key=lambda item: (item.category, item.id))
+        entry = _outlet_dict(o)
+        entry["categories"] = sorted({item.category for item in items})
+        entry["items"] = [
+            {
+                "id": item.id,
+                "item_name": item.item_name,
+                "description": item.description,
+                "category": item.category,
+                "price": float(item.price),
+                "image_url": item.image_url,
+                "image_variants": image_pipeline.variants_for(item.image_url),
+                "is_available": item.is_available,
+                "preparation_time": item.preparation_time,
+                "outlet_id": item.outlet_id
+            }
+            for item in items
+        ]
+        result.append(entry)
+
+    return {
+        "outlets": result,
+        "best_sellers": _load_best_sellers(BEST_SELLERS_COUNT)
+    }
 
 
 # GET ALL MENU ITEMS (PUBLIC)
+# Optional filters: outlet_id, category, is_available, min_price, max_price,
+# max_preparation_time. Passing `limit` or `cursor` switches to keyset
+# pagination on (outlet_id, id) and wraps the list in {"items", "next_cursor"}.
 @menu_bp.route("/menu_items", methods=["GET"])
+@catalog_etag(["menu"])
 def get_all_menu_items():
-    items = MenuItem.query.all()
-    return jsonify([
-        {
+
+    try:
+        filters = _parse_menu_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    paginate = "limit" in request.args or "cursor" in request.args
+    if not paginate:
+        filters.pop("limit")
+
+    cache_name = "menu_items?" + urlencode(sorted(
+        (k, v) for k, v in filters.items() if v is not None
+    ))
+
+    page = catalog_cache.get_or_set(
+        "menu", cache_name, lambda: _load_menu_items(filters)
+    )
+
+    if not paginate:
+        return jsonify(page["items"]), 200
+
+    return jsonify(page), 200
+
+
+MENU_PAGE_SIZE = 50
+MENU_PAGE_MAX = 200
+
+
+def _parse_menu_filters(args):
+
+    def number(name, cast):
+        value = args.get(name)
+        if value in (None, ""):
+            return None
+        try:
+            return cast(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}")
+
+    is_available = args.get("is_available")
+    if is_available is not None:
+        is_available = is_available.lower() == "true"
+
+    limit = number("limit", int) or MENU_PAGE_SIZE
+    if limit < 1:
+        raise ValueError("Invalid limit")
+
+    cursor = args.get("cursor") or None
+    if cursor:
+        decode_cursor(cursor, int, int)
+
+    return {
+        "outlet_id": number("outlet_id", int),
+        "category": args.get("category") or None,
+        "is_available": is_available,
+        "min_price": number("min_price", float),
+        "max_price": number("max_price", float),
+        "max_preparation_time": number("max_preparation_time", int),
+        "cursor": cursor,
+        "limit": min(limit, MENU_PAGE_MAX)
+    }
+
+
+def _load_menu_items(filters):
+    query = MenuItem.query
+
+    if filters["outlet_id"] is not None:
+        query = query.filter(MenuItem.outlet_id == filters["outlet_id"])
+
+    if filters["category"] is not None:
+        query = query.filter(MenuItem.category == filters["category"])
+
+    if filters["is_available"] is not None:
+        query = query.filter(MenuItem.is_available == filters["is_available"])
+
+    if filters["min_price"] is not None:
+        query = query.filter(MenuItem.price >= filters["min_price"])
+
+    if filters["max_price"] is not None:
+        query = query.filter(MenuItem.price <= filters["max_price"])
+
+    if filters["max_preparation_time"] is not None:
+        query = query.filter(MenuItem.preparation_time <= filters["max_preparation_time"])
+
+    if filters["cursor"]:
+        query = query.filter(
+            tuple_(MenuItem.outlet_id, MenuItem.id) > decode_cursor(filters["cursor"], int, int)
+        )
+
+    query = query.order_by(MenuItem.outlet_id, MenuItem.id)
+
+    limit = filters.get("limit")
+    if limit:
+        # One extra row tells us whether there is a next page
+        items = query.limit(limit + 1).all()
+        has_more = len(items) > limit
+        items = items[:limit]
+    else:
+        items = query.all()
+        has_more = False
+
+    return {
+        "items": [
+            {
+                "id": item.id,
+                "item_name": item.item_name,
+                "description": item.description,
+                "category": item.category,
+                "price": float(item.price),
+                "image_url": item.image_url,
+                "image_variants": image_pipeline.variants_for(item.image_url),
+                "is_available": item.is_available,
+                "preparation_time": item.preparation_time,
+                "outlet_id": item.outlet_id
+            }
+            for item in items
+        ],
+        "next_cursor": encode_cursor(items[-1].outlet_id, items[-1].id) if has_more else None
+    }
+
+
+# SEARCH MENU ITEMS (PUBLIC)
+# Ranked full-text match over item name, description, category and outlet name
+@menu_bp.route("/menu_items/search", methods=["GET"])
+@catalog_etag(["menu"])
+def search_menu_items():
+
+    q = (request.args.get("q") or "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+
+    limit = min(request.args.get("limit", 20, type=int) or 20, MENU_PAGE_MAX)
+    outlet_id = request.args.get("outlet_id", type=int)
+
+    cache_name = "search?" + urlencode([("limit", limit), ("outlet_id", outlet_id or ""), ("q", q.lower())])
+
+    results = catalog_cache.get_or_set(
+        "menu", cache_name, lambda: _load_search_results(q, limit, outlet_id)
+    )
+
+    return jsonify({"query": q, "results": results}), 200
+
+
+def _load_search_results(q, limit, outlet_id):
+    ranked = search_index.search(q, limit=limit, outlet_id=outlet_id)
+    if not ranked:
+        return []
+
+    rows = (
+        db.session.query(MenuItem, Outlet.outlet_name)
+        .join(Outlet, Outlet.id == MenuItem.outlet_id)
+        .filter(MenuItem.id.in_([item_id for item_id, _ in ranked]))
+        .all()
+    )
+    by_id = {item.id: (item, outlet_name) for item, outlet_name in rows}
+
+    results = []
+    for item_id, score in ranked:
+        if item_id not in by_id:
+            continue
+        item, outlet_name = by_id[item_id]
+        results.append({
             "id": item.id,
             "item_name": item.item_name,
             "description": item.description,
             "category": item.category,
             "price": float(item.price),
             "image_url": item.image_url,
+            "image_variants": image_pipeline.variants_for(item.image_url),
             "is_available": item.is_available,
             "preparation_time": item.preparation_time,
-            "outlet_id": item.outlet_id
-        }
-        for item in items
-    ]), 200
+            "outlet_id": item.outlet_id,
+            "outlet_name": outlet_name,
+            "score": round(score, 4)
+        })
+    return results
 
 
 # GET BEST SELLERS (PUBLIC)
+# ?days=N ranks by the last N days of sales instead of all time
 @menu_bp.route("/menu_items/best_sellers", methods=["GET"])
 def get_best_sellers():
-    # 1. Fetch top selling items
-    top_selling = (
-        db.session.query(MenuItem, func.count(OrderItem.id).label('sales_count'))
-        .join(OrderItem, MenuItem.id == OrderItem.menu_item_id)
-        .group_by(MenuItem.id)
-        .order_by(func.count(OrderItem.id).desc())
-        .limit(6)
-        .all()
+    days = request.args.get("days", type=int)
+    if days is not None and days < 1:
+        return jsonify({"error": "Invalid days"}), 400
+
+    best_sellers = catalog_cache.get_or_set(
+        "menu",
+        f"best_sellers?days={days or ''}",
+        lambda: _load_best_sellers(BEST_SELLERS_COUNT, days),
+        ttl=BEST_SELLERS_TTL
     )
-    
-    # Extract MenuItem objects
-    best_sellers = [item[0] for item in top_selling]
-    
-    # 2. Check if we need more items
-    if len(best_sellers) < 6:
-        needed = 6 - len(best_sellers)
-        existing_ids = [item.id for item in best_sellers]
-        
-        # Fetch potential fillers excluding already selected ones
-        potential_items = MenuItem.query.filter(MenuItem.id.notin_(existing_ids)).all()
-        
-        if potential_items:
-            # Shuffle and take needed
-            # Use min to avoid error if potential_items < needed
-            random_fillers = random.sample(potential_items, min(len(potential_items), needed))
-            best_sellers.extend(random_fillers)
-            
+    return jsonify(best_sellers), 200
+
+
+BEST_SELLERS_COUNT = 6
+BEST_SELLERS_TTL = 60
+
+
+def _load_best_sellers(count, days=None):
+    # 1. Top sellers straight from the sales counters
+    top_ids = top_sellers(count, days=days)
+
+    items_by_id = {
+        item.id: item
+        for item in (
+            MenuItem.query
+            .options(joinedload(MenuItem.outlet))
+            .filter(MenuItem.id.in_(top_ids))
+            .all()
+        )
+    } if top_ids else {}
+    best_sellers = [items_by_id[i] for i in top_ids if i in items_by_id]
+
+    # 2. Top up with a random window of other items
+    needed = count - len(best_sellers)
+    if needed > 0:
+        fillers = MenuItem.query.filter(MenuItem.id.notin_(top_ids))
+        available = fillers.count()
+
+        if available:
+            start = random.randrange(max(available - needed, 0) + 1)
+            best_sellers.extend(
+                fillers
+                .options(joinedload(MenuItem.outlet))
+                .order_by(MenuItem.id)
+                .offset(start)
+                .limit(needed)
+                .all()
+            )
+
     # Format response
-    return jsonify([
+    return [
         {
             "id": item.id,
             "item_name": item.item_name,
@@ -88,6 +337,7 @@ def get_best_sellers():
             "category": item.category,
             "price": float(item.price),
             "image_url": item.image_url,
+            "image_variants": image_pipeline.variants_for(item.image_url),
             "is_available": item.is_available,
             "preparation_time": item.preparation_time,
             "outlet_id": item.outlet_id,
@@ -95,7 +345,7 @@ def get_best_sellers():
             "outlet_name": item.outlet.outlet_name if item.outlet else "Unknown"
         }
         for item in best_sellers
-    ]), 200
+    ]
 
 
 # @menu_bp.route("/menu_items/<int:outlet_id>", methods=["GET"])
@@ -119,6 +369,7 @@ def get_best_sellers():
 
 # GET OUTLET MENU (PUBLIC)
 @menu_bp.route("/outlets/<int:outlet_id>", methods=["GET"])
+@catalog_etag(lambda outlet_id: [f"outlet:{outlet_id}"])
 def get_outlet_menu(outlet_id):
 
     outlet = Outlet.query.get(outlet_id)
@@ -151,6 +402,7 @@ def get_outlet_menu(outlet_id):
                 "category": item.category,
                 "price": float(item.price),
                 "image_url": item.image_url,
+                "image_variants": image_pipeline.variants_for(item.image_url),
                 "is_available": item.is_available,
                 "preparation_time": item.preparation_time,
                 "created_at": item.created_at.isoformat() if item.created_at else None
@@ -162,6 +414,7 @@ def get_outlet_menu(outlet_id):
 
 # GET SINGLE ITEM (PUBLIC)
 @menu_bp.route("/item/<int:item_id>", methods=["GET"])
+@catalog_etag(["menu"])
 def get_menu_item(item_id):
 
     item = MenuItem.query.get(item_id)
@@ -176,6 +429,7 @@ def get_menu_item(item_id):
         "category": item.category,
         "price": float(item.price),
         "image_url": item.image_url,
+        "image_variants": image_pipeline.variants_for(item.image_url),
         "is_available": item.is_available,
         "preparation_time": item.preparation_time,
         "created_at": item.created_at.isoformat() if item.created_at else None,
@@ -183,10 +437,6 @@ def get_menu_item(item_id):
     }), 200
 
 
-import os
-from werkzeug.utils import secure_filename
-from flask import current_app
-
 # ... (inside create_menu_item)
 
 @menu_bp.route("/item", methods=["POST"])
@@ -225,20 +475,21 @@ def create_menu_item():
 
     # Handle Image Upload
     image_url = data.get("image_url") # Default/Fallback
+    image_variants = {}
     if image_file:
-        filename = secure_filename(image_file.filename)
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads')
-        
-        # Ensure directory exists (redundant safety)
-        os.makedirs(upload_folder, exist_ok=True)
-        
-        image_path = os.path.join(upload_folder, filename)
-        image_file.save(image_path)
-        
-        # Generate URL
-        # Assumption: server is running on port 5000 and static files are served from /static
-        # In production, this might need domain config, but for now:
-        image_url = f"http://localhost:5000/static/uploads/{filename}"
+        try:
+            # Variants are generated in the background; listings show them
+            # once they exist, so drop the outlet's cached pages then
+            filename = image_pipeline.save_upload(
+                image_file,
+                image_pipeline.folder,
+                on_ready=lambda: catalog_cache.invalidate_outlet(outlet_id)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        image_url = image_pipeline.url(filename)
+        image_variants = image_pipeline.variant_urls(filename)
 
     new_item = MenuItem(
         outlet_id=outlet_id,
@@ -252,7 +503,10 @@ def create_menu_item():
     )
 
     db.session.add(new_item)
+    db.session.flush()
+    search_index.upsert([new_item.id])
     db.session.commit()
+    catalog_cache.invalidate_outlet(outlet_id)
 
     return jsonify({
         "id": new_item.id,
@@ -263,7 +517,8 @@ def create_menu_item():
         "image_url": new_item.image_url,
         "is_available": new_item.is_available,
         "preparation_time": new_item.preparation_time,
-        "outlet_id": new_item.outlet_id
+        "outlet_id": new_item.outlet_id,
+        "image_variants": image_variants
     }), 201
 
 
@@ -309,15 +564,362 @@ def update_menu_item(item_id):
 
             setattr(item, field, data[field])
 
+    db.session.flush()
+    search_index.upsert([item.id])
     db.session.commit()
+    catalog_cache.invalidate_outlet(outlet_id)
 
     return jsonify({
         "message": "Menu item updated successfully"
     }), 200
 
 
+# BULK IMPORT / UPSERT MENU ITEMS (OWNER ONLY)
+# Body: JSON array (or {"items": [...]}), text/csv, or a multipart "file".
+# Rows with an "id", or whose item_name already exists in the outlet, update
+# that item; the rest are inserted. Nothing is written unless every row is valid.
+@menu_bp.route("/items/bulk", methods=["POST"])
+@jwt_required()
+@outlet_required
+def bulk_import_menu_items():
+
+    identity = get_jwt_identity()
+    outlet_id = identity["id"]
+
+    try:
+        rows = _read_import_rows()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not rows:
+        return jsonify({"error": "No items to import"}), 400
+
+    if len(rows) > MAX_IMPORT_ROWS:
+        return jsonify({"error": f"At most {MAX_IMPORT_ROWS} items per import"}), 400
+
+    existing = dict(
+        db.session.query(MenuItem.item_name, MenuItem.id)
+        .filter(MenuItem.outlet_id == outlet_id)
+        .all()
+    )
+    owned_ids = set(existing.values())
+
+    inserts, updates, errors = [], [], []
+    seen_names = set()
+    targeted_ids = set()
+
+    for number, row in enumerate(rows, start=1):
+        values, error = _clean_import_row(row)
+        item_id = None
+
+        if not error and values["item_name"] in seen_names:
+            error = "Duplicate item_name in import"
+
+        if not error and values.get("id") is not None:
+            item_id = values.pop("id")
+            if item_id not in owned_ids:
+                error = "Menu item not found"
+            elif existing.get(values["item_name"], item_id) != item_id:
+                # A rename onto a name another item of the outlet already has
+                error = "item_name is already used by another menu item"
+        elif not error:
+            item_id = existing.get(values["item_name"])
+
+        # One row per item, whether it was matched by id or by name
+        if not error and item_id in targeted_ids:
+            error = "Menu item is already updated by another row"
+
+        if error:
+            errors.append({"row": number, "error": error})
+            continue
+
+        seen_names.add(values["item_name"])
+
+        if item_id:
+            targeted_ids.add(item_id)
+            updates.append((number, dict(values, id=item_id)))
+        else:
+            inserts.append((number, dict(IMPORT_DEFAULTS, **values, outlet_id=outlet_id)))
+
+    if errors:
+        return jsonify({"error": "Validation failed", "errors": errors}), 400
+
+    results = []
+
+    if inserts:
+        new_ids = db.session.execute(
+            insert(MenuItem).returning(MenuItem.id, sort_by_parameter_order=True),
+            [values for _, values in inserts]
+        ).scalars().all()
+        results += [
+            {"row": number, "id": new_id, "action": "created"}
+            for (number, _), new_id in zip(inserts, new_ids)
+        ]
+
+    if updates:
+        db.session.execute(update(MenuItem), [values for _, values in updates])
+        results += [
+            {"row": number, "id": values["id"], "action": "updated"}
+            for number, values in updates
+        ]
+
+    search_index.upsert(r["id"] for r in results)
+    db.session.commit()
+    catalog_cache.invalidate_outlet(outlet_id)
+
+    results.sort(key=lambda r: r["row"])
+
+    return jsonify({
+        "created": len(inserts),
+        "updated": len(updates),
+        "items": results
+    }), 200
+
+
+MAX_IMPORT_ROWS = 2000
+
+IMPORT_FIELDS = [
+    "id",
+    "item_name",
+    "description",
+    "category",
+    "price",
+    "image_url",
+    "is_available",
+    "preparation_time"
+]
+
+# Only new items get these; updates leave fields missing from the row as they are
+IMPORT_DEFAULTS = {
+    "description": None,
+    "image_url": None,
+    "is_available": True,
+    "preparation_time": 15
+}
+
+
+def _read_import_rows():
+    upload = request.files.get("file")
+
+    if upload:
+        text_body = upload.read().decode("utf-8-sig")
+    elif request.mimetype in ("text/csv", "application/csv"):
+        text_body = request.get_data(as_text=True)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get("items")
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of items or a CSV file")
+        return data
+
+    return list(csv.DictReader(io.StringIO(text_body)))
+
+
+def _clean_import_row(row):
+    """
+    Validate one import row without building a MenuItem. Returns (values, error).
+
+    Optional fields that are missing or blank are left out of `values`.
+    """
+    if not isinstance(row, dict):
+        return None, "Row must be an object"
+
+    row = {
+        k: (v.strip() if isinstance(v, str) else v)
+        for k, v in row.items() if k in IMPORT_FIELDS
+    }
+
+    for field in ["item_name", "price", "category"]:
+        if row.get(field) in (None, ""):
+            return None, f"{field} is required"
+
+    try:
+        # Same validator the model runs on assignment
+        item_name = MenuItem.validate_item_name(None, "item_name", str(row["item_name"]))
+    except ValueError as e:
+        return None, str(e)
+
+    try:
+        price = float(row["price"])
+        if price < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return None, "Invalid price"
+
+    values = {
+        "item_name": item_name,
+        "category": str(row["category"]),
+        "price": price
+    }
+
+    for field in ["description", "image_url"]:
+        if row.get(field) not in (None, ""):
+            values[field] = row[field]
+
+    if row.get("preparation_time") not in (None, ""):
+        try:
+            values["preparation_time"] = int(row["preparation_time"])
+            if values["preparation_time"] < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            return None, "Invalid preparation_time"
+
+    is_available = row.get("is_available")
+    if is_available not in (None, ""):
+        if isinstance(is_available, str):
+            is_available = is_available.lower() not in ("false", "0", "no")
+        values["is_available"] = bool(is_available)
+
+    item_id = row.get("id")
+    if item_id not in (None, ""):
+        try:
+            item_id = int(item_id)
+        except (TypeError, ValueError):
+            return None, "Invalid id"
+    else:
+        item_id = None
+
+    if item_id is not None:
+        values["id"] = item_id
+
+    return values, None
+
+
+# BULK AVAILABILITY TOGGLE (OWNER ONLY)
+# Body: {"is_available": bool} plus one of "item_ids", "category" or
+# "all": true. One UPDATE for the whole selection, one catalog version bump,
+# and an "availability" event on /menu_items/stream.
+@menu_bp.route("/items/availability", methods=["PATCH", "PUT"])
+@jwt_required()
+@outlet_required
+def bulk_update_availability():
+
+    data = request.get_json() or {}
+
+    identity = get_jwt_identity()
+    outlet_id = identity["id"]
+
+    is_available = data.get("is_available")
+    if not isinstance(is_available, bool):
+        return jsonify({"error": "is_available must be true or false"}), 400
+
+    stmt = update(MenuItem).where(MenuItem.outlet_id == outlet_id)
+
+    if data.get("item_ids"):
+        item_ids = data["item_ids"]
+        if not isinstance(item_ids, list) or not all(isinstance(i, int) for i in item_ids):
+            return jsonify({"error": "item_ids must be a list of ids"}), 400
+        stmt = stmt.where(MenuItem.id.in_(item_ids))
+    elif data.get("category"):
+        stmt = stmt.where(MenuItem.category == data["category"])
+    elif data.get("all") is not True:
+        return jsonify({"error": "item_ids, category or all is required"}), 400
+
+    # Only rows that actually flip, so a repeated toggle is a no-op
+    stmt = (
+        stmt
+        .where(or_(MenuItem.is_available != is_available, MenuItem.is_available.is_(None)))
+        .values(is_available=is_available)
+        .returning(MenuItem.id)
+    )
+
+    changed = db.session.execute(
+        stmt, execution_options={"synchronize_session": False}
+    ).scalars().all()
+    db.session.commit()
+
+    if changed:
+        catalog_cache.invalidate_outlet(outlet_id)
+        event_broker.publish("catalog", "availability", {
+            "outlet_id": outlet_id,
+            "is_available": is_available,
+            "item_ids": sorted(changed)
+        })
+
+    return jsonify({
+        "message": "Availability updated",
+        "is_available": is_available,
+        "updated": len(changed),
+        "item_ids": sorted(changed)
+    }), 200
+
+
+# CATALOG CHANGE STREAM (PUBLIC, SERVER-SENT EVENTS)
+@menu_bp.route("/menu_items/stream", methods=["GET"])
+def stream_catalog_events():
+    last_event_id = parse_last_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+    return Response(
+        event_broker.stream(["catalog"], last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# GET CATEGORY FACETS FOR ALL OUTLETS (PUBLIC)
+# Per (outlet, category): item count, available count and price range, from
+# one grouped query. "categories" rolls the same rows up across outlets.
+@menu_bp.route("/categories", methods=["GET"])
+@catalog_etag(["outlets", "menu"])
+def get_category_facets():
+    return jsonify(
+        catalog_cache.get_or_set(["outlets", "menu"], "facets", _load_category_facets)
+    ), 200
+
+
+def _load_category_facets():
+    rows = (
+        db.session.query(
+            Outlet.id,
+            Outlet.outlet_name,
+            MenuItem.category,
+            func.count(MenuItem.id),
+            func.sum(case((MenuItem.is_available == True, 1), else_=0)),
+            func.min(MenuItem.price),
+            func.max(MenuItem.price)
+        )
+        .join(MenuItem, MenuItem.outlet_id == Outlet.id)
+        .filter(Outlet.is_active == True)
+        .group_by(Outlet.id, Outlet.outlet_name, MenuItem.category)
+        .order_by(Outlet.id, MenuItem.category)
+        .all()
+    )
+
+    facets = []
+    totals = {}
+    for outlet_id, outlet_name, category, total, available, min_price, max_price in rows:
+        available = int(available or 0)
+        facets.append({
+            "outlet_id": outlet_id,
+            "outlet_name": outlet_name,
+            "category": category,
+            "total": total,
+            "available": available,
+            "min_price": float(min_price),
+            "max_price": float(max_price)
+        })
+
+        summary = totals.setdefault(category, {
+            "category": category,
+            "total": 0,
+            "available": 0,
+            "outlets": 0
+        })
+        summary["total"] += total
+        summary["available"] += available
+        summary["outlets"] += 1
+
+    return {
+        "facets": facets,
+        "categories": sorted(totals.values(), key=lambda c: c["category"])
+    }
+
+
 # GET CATEGORIES (PUBLIC)
 @menu_bp.route("/categories/<int:outlet_id>", methods=["GET"])
+@catalog_etag(lambda outlet_id: [f"outlet:{outlet_id}"])
 def get_menu_categories(outlet_id):
 
     outlet = Outlet.query.get(outlet_id)
@@ -353,6 +955,9 @@ def delete_menu_item(item_id):
     if item.outlet_id != identity["id"]:
         return jsonify({"error": "Forbidden"}), 403
     
+    outlet_id = item.outlet_id
+    search_index.remove([item.id])
     db.session.delete(item)
     db.session.commit()
+    catalog_cache.invalidate_outlet(outlet_id)
     return jsonify({"message": "Menu item deleted successfully"}), 200
@@ -1,190 +1,175 @@
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, request, jsonify, Response, url_for
 from flask_jwt_extended import (
     jwt_required,
     get_jwt_identity
 )
 from datetime import datetime
+from sqlalchemy import update, tuple_
+from sqlalchemy.orm import selectinload
 
-from decimal import Decimal
-
-from extensions import db
+from extensions import db, event_broker
 
 from models import (
     Order,
     OrderItem,
+    OrderIntent,
     MenuItem,
-    Outlet,
-    Reservation,
     FoodCourtTable
 )
 
-from utils import customer_required
+from utils import (
+    customer_required,
+    encode_cursor,
+    decode_cursor,
+    filter_time_range,
+    idempotent
+)
+from events import parse_last_event_id
+from kitchen import ACTIVE_STATUSES, kitchen_board, ready_at
+from ordering import (
+    OrderError,
+    place_order,
+    place_checkout,
+    order_placed,
+    order_summary,
+    publish_order_event
+)
+from intake import order_intake
 
 
 order_bp = Blueprint("orders", __name__, url_prefix="/orders")
 
 
 # CREATE ORDER (CUSTOMER ONLY)
+# With ORDER_INTAKE_ASYNC (or a `Prefer: respond-async` header) the order is
+# stored as an intent and placed by the intake workers: 202 + status URL.
 
 @order_bp.route("", methods=["POST"])
 @jwt_required()
 @customer_required
+@idempotent
 def create_order():
 
     data = request.get_json() or {}
 
-    items = data.get("items") or data.get("order_items")
-    outlet_id = data.get("outlet_id")
-
-    if not outlet_id or not items:
-        return jsonify({
-            "error": "outlet_id and items are required"
-        }), 400
-
-    if not isinstance(items, list):
-        return jsonify({
-            "error": "items must be a list"
-        }), 400
-
     # Get customer from JWT
     identity = get_jwt_identity()
     customer_id = identity["id"]
 
-    # Validate outlet
-    outlet = Outlet.query.get(outlet_id)
-    if not outlet:
-        return jsonify({"error": "Outlet not found"}), 404
+    if order_intake.enabled or "respond-async" in request.headers.get("Prefer", ""):
+        return _accept_order_intent(customer_id, data)
 
-    # Validate reservation (optional)
-    reservation_id = data.get("reservation_id")
+    try:
+        order, prep = place_order(customer_id, data)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status
 
-    if reservation_id:
+    db.session.commit()
 
-        reservation = Reservation.query.get(reservation_id)
+    order_placed(order, prep)
 
-        if not reservation:
-            return jsonify({"error": "Invalid reservation"}), 400
+    return jsonify(order_summary(order)), 201
 
-        if reservation.customer_id != customer_id:
-            return jsonify({"error": "Unauthorized reservation"}), 403
 
-        if reservation.status != "confirmed":
-            return jsonify({"error": "Reservation not confirmed"}), 400
+# CHECKOUT A MULTI-OUTLET CART (CUSTOMER ONLY)
+# Same body as create_order minus outlet_id; items may come from several
+# outlets. One order per outlet is created, all or none.
 
-    # Create order
-    discount_amount = Decimal("0.00")
-    
-    # Check for reservation discount
-    target_res = None
-    if reservation_id:
-        target_res = Reservation.query.get(reservation_id)
-        if target_res and target_res.status != "confirmed":
-             target_res = None # Only apply to confirmed
-    else:
-        # Auto-find a confirmed reservation for today
-        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        target_res = Reservation.query.filter(
-            Reservation.customer_id == customer_id,
-            Reservation.outlet_id == outlet_id,
-            Reservation.status == "confirmed",
-            Reservation.time_reserved_for >= today_start,
-            Reservation.is_fee_deducted == False
-        ).first()
-
-    if target_res:
-        discount_amount = Decimal("500.00")
-        reservation_id = target_res.id
-
-    # New fields
-    order_type = data.get("order_type", "dine-in")
-    table_number = data.get("table_number")
-
-    if not table_number:
-        return jsonify({"error": "Table number is required"}), 400
+@order_bp.route("/checkout", methods=["POST"])
+@jwt_required()
+@customer_required
+@idempotent
+def checkout():
 
-    order = Order(
-        customer_id=customer_id,
-        reservation_id=reservation_id,
-        status="pending",
-        total_amount=0,
-        discount_amount=discount_amount,
-        order_type=order_type,
-        table_number=table_number
-    )
+    data = request.get_json() or {}
+    customer_id = get_jwt_identity()["id"]
 
-    db.session.add(order)
-    db.session.flush()  # Get order.id
+    try:
+        placed = place_checkout(customer_id, data)
+    except OrderError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status
 
-    # Process items
-    total_amount = Decimal("0.00")
-    for item in items:
+    db.session.commit()
 
-        if "menu_item_id" not in item:
-            db.session.rollback()
-            return jsonify({
-                "error": "menu_item_id is required"
-            }), 400
+    for order, prep in placed:
+        order_placed(order, prep)
 
-        menu_item = MenuItem.query.get(item["menu_item_id"])
+    orders = [order_summary(order) for order, _ in placed]
 
-        if not menu_item:
-            db.session.rollback()
-            return jsonify({"error": "Menu item not found"}), 404
+    return jsonify({
+        "orders": orders,
+        "total_amount": sum(o["total_amount"] for o in orders),
+        "time_till_ready": max(o["time_till_ready"] for o in orders)
+    }), 201
 
-        if menu_item.outlet_id != outlet.id:
-            db.session.rollback()
-            return jsonify({"error": "Invalid menu item"}), 400
 
-        if not menu_item.is_available:
-            db.session.rollback()
-            return jsonify({"error": "Item unavailable"}), 400
+def _accept_order_intent(customer_id, data):
+    # Only the shape is checked here, pricing and stock are the worker's job
+    items = data.get("items") or data.get("order_items")
 
-        quantity = int(item.get("quantity", 1))
+    if not data.get("outlet_id") or not items:
+        return jsonify({"error": "outlet_id and items are required"}), 400
 
-        if quantity < 1:
-            db.session.rollback()
-            return jsonify({"error": "Invalid quantity"}), 400
+    if not isinstance(items, list):
+        return jsonify({"error": "items must be a list"}), 400
 
-        subtotal = Decimal(menu_item.price) * quantity
-        total_amount += subtotal
+    if not data.get("table_number"):
+        return jsonify({"error": "Table number is required"}), 400
 
-        db.session.add(
-            OrderItem(
-                order_id=order.id,
-                menu_item_id=menu_item.id,
-                quantity=quantity,
-                price=menu_item.price
-            )
-        )
+    if not order_intake.reserve():
+        return jsonify({"error": "Too many orders in progress, retry shortly"}), 503, {
+            "Retry-After": str(order_intake.retry_after)
+        }
 
-    # Final logic for total and deduction
-    if total_amount < discount_amount:
-        discount_amount = total_amount # Can't deduct more than total
+    try:
+        intent = OrderIntent(customer_id=customer_id, payload=json.dumps(data))
+        db.session.add(intent)
+        db.session.commit()
+    except Exception:
+        order_intake.release()
+        raise
 
-    order.total_amount = total_amount - discount_amount
-    order.discount_amount = discount_amount
+    order_intake.submit(intent.id)
 
-    if target_res and discount_amount > 0:
-        target_res.is_fee_deducted = True
-    
-    # Calculate ETA: max item prep time + 10-15 min buffer (using 12 min as default)
-    prep_times = [item.menu_item.preparation_time for item in order.order_items]
-    if prep_times:
-        order.time_till_ready = max(prep_times) + 12
-    else:
-        order.time_till_ready = 15
+    status_url = url_for("orders.get_order_intent", intent_id=intent.id)
+    return jsonify({
+        "intent_id": intent.id,
+        "status": intent.status,
+        "status_url": status_url
+    }), 202, {"Location": status_url, "Retry-After": "1"}
 
-    db.session.commit()
 
-    return jsonify({
-        "order_id": order.id,
-        "status": order.status,
-        "total_amount": float(order.total_amount),
-        "time_till_ready": order.time_till_ready
-    }), 201
+# ORDER INTENT STATUS (CUSTOMER ONLY)
+@order_bp.route("/intents/<int:intent_id>", methods=["GET"])
+@jwt_required()
+@customer_required
+def get_order_intent(intent_id):
+    intent = OrderIntent.query.get(intent_id)
+
+    if not intent or intent.customer_id != get_jwt_identity()["id"]:
+        return jsonify({"error": "Order intent not found"}), 404
+
+    result = {"intent_id": intent.id, "status": intent.status}
+
+    if intent.status == "completed":
+        result["order"] = order_summary(intent.order)
+    elif intent.status == "failed":
+        result["error"] = intent.error
+        result["error_status"] = intent.error_status
+    else:
+        return jsonify(result), 200, {"Retry-After": "1"}
+
+    return jsonify(result), 200
 
 
 # GET ORDERS (CUSTOMER OR OUTLET)
+# Optional filters: status, order_type, from, to (ISO date or datetime).
+# Passing `limit` or `cursor` switches to keyset pagination on
+# (created_at, id), newest first, wrapped in {"orders", "next_cursor"}.
 @order_bp.route("", methods=["GET"])
 @jwt_required()
 def get_orders():
@@ -205,35 +190,87 @@ def get_orders():
         # If outlet_id is provided, it must match their user_id (if they are an outlet)
         # Assuming outlet registered as user with id X
         target_outlet_id = outlet_id or user_id
-        # We need to filter by menu items belonging to this outlet
-        query = query.join(OrderItem).join(MenuItem).filter(MenuItem.outlet_id == target_outlet_id).distinct()
+        query = query.filter(Order.outlet_id == target_outlet_id)
     else:
         return jsonify({"error": "Forbidden"}), 403
 
-    orders = query.order_by(Order.created_at.desc()).all()
-
-    return jsonify([
-        {
-            "id": o.id,
-            "customer_id": o.customer_id,
-            "reservation_id": o.reservation_id,
-            "total_amount": float(o.total_amount),
-            "discount_amount": float(o.discount_amount) if o.discount_amount else 0.0,
-            "status": o.status,
-            "order_type": o.order_type,
-            "table_number": o.table_number,
-            "time_till_ready": o.time_till_ready,
-            "created_at": o.created_at.isoformat() if o.created_at else None,
-            "order_items": [
-                {
-                    "menu_item_id": item.menu_item_id,
-                    "item_name": item.menu_item.item_name if hasattr(item, 'menu_item') and item.menu_item else f"Item #{item.menu_item_id}",
-                    "quantity": item.quantity,
-                    "price": float(item.price)
-                } for item in o.order_items
-            ]
-        } for o in orders
-    ]), 200
+    try:
+        query = _filter_orders(query, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = query.options(
+        selectinload(Order.order_items)
+        .joinedload(OrderItem.menu_item)
+        .load_only(MenuItem.id, MenuItem.item_name)
+    ).order_by(Order.created_at.desc(), Order.id.desc())
+
+    paginate = "limit" in request.args or "cursor" in request.args
+
+    if paginate:
+        limit = request.args.get("limit", ORDER_PAGE_SIZE, type=int) or ORDER_PAGE_SIZE
+        limit = max(1, min(limit, ORDER_PAGE_MAX))
+        # One extra row tells us whether there is a next page
+        orders = query.limit(limit + 1).all()
+        has_more = len(orders) > limit
+        orders = orders[:limit]
+    else:
+        orders = query.all()
+        has_more = False
+
+    result = [_order_dict(o) for o in orders]
+
+    if not paginate:
+        return jsonify(result), 200
+
+    return jsonify({
+        "orders": result,
+        "next_cursor": encode_cursor(orders[-1].created_at, orders[-1].id) if has_more else None
+    }), 200
+
+
+ORDER_PAGE_SIZE = 25
+ORDER_PAGE_MAX = 100
+
+
+def _filter_orders(query, args):
+    if args.get("status"):
+        query = query.filter(Order.status == args["status"])
+
+    if args.get("order_type"):
+        query = query.filter(Order.order_type == args["order_type"])
+
+    query = filter_time_range(query, Order.created_at, args)
+
+    if args.get("cursor"):
+        created_at, order_id = decode_cursor(args["cursor"], datetime, int)
+        query = query.filter(tuple_(Order.created_at, Order.id) < (created_at, order_id))
+
+    return query
+
+
+def _order_dict(o):
+    return {
+        "id": o.id,
+        "customer_id": o.customer_id,
+        "outlet_id": o.outlet_id,
+        "reservation_id": o.reservation_id,
+        "total_amount": float(o.total_amount),
+        "discount_amount": float(o.discount_amount) if o.discount_amount else 0.0,
+        "status": o.status,
+        "order_type": o.order_type,
+        "table_number": o.table_number,
+        "time_till_ready": o.time_till_ready,
+        "created_at": o.created_at.isoformat() if o.created_at else None,
+        "order_items": [
+            {
+                "menu_item_id": item.menu_item_id,
+                "item_name": item.menu_item.item_name if item.menu_item else f"Item #{item.menu_item_id}",
+                "quantity": item.quantity,
+                "price": float(item.price)
+            } for item in o.order_items
+        ]
+    }
 
 
 # UPDATE ORDER STATUS (OUTLET ONLY)
@@ -264,8 +301,194 @@ def update_order_status(order_id):
     order.status = status
     db.session.commit()
 
+    kitchen_board.update(order.id, order.outlet_id, status)
+    publish_order_event("order_status", order)
+
     return jsonify({
         "message": "Order status updated",
         "order_id": order.id,
         "status": order.status
     }), 200
+
+
+# BULK ORDER STATUS (OUTLET ONLY)
+# Body: {"order_ids": [...], "status": "ready", "from_status": optional}.
+# One conditional UPDATE moves every order that belongs to the outlet and
+# sits in a state allowed to reach `status`; the rest are reported back.
+@order_bp.route("/status", methods=["PATCH", "POST"])
+@jwt_required()
+def bulk_update_order_status():
+    identity = get_jwt_identity()
+    outlet_id = identity["id"]
+    role = str(identity.get("role", "")).lower()
+
+    if role not in ["outlet", "owner"]:
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json() or {}
+    status = data.get("status")
+    order_ids = data.get("order_ids")
+
+    if status not in ORDER_TRANSITIONS:
+        return jsonify({"error": "Invalid status"}), 400
+
+    if (
+        not isinstance(order_ids, list) or not order_ids
+        or not all(isinstance(i, int) and not isinstance(i, bool) for i in order_ids)
+    ):
+        return jsonify({"error": "order_ids must be a non-empty list of ids"}), 400
+
+    order_ids = list(dict.fromkeys(order_ids))
+    if len(order_ids) > ORDER_BULK_MAX:
+        return jsonify({"error": f"At most {ORDER_BULK_MAX} orders per request"}), 400
+
+    sources = {s for s, targets in ORDER_TRANSITIONS.items() if status in targets}
+    if not sources:
+        return jsonify({"error": f"Orders cannot be moved to {status}"}), 400
+
+    from_status = data.get("from_status")
+    if from_status:
+        if from_status not in sources:
+            return jsonify({"error": f"Cannot move orders from {from_status} to {status}"}), 400
+        sources = {from_status}
+
+    moved = db.session.execute(
+        update(Order)
+        .where(
+            Order.id.in_(order_ids),
+            Order.outlet_id == outlet_id,
+            Order.status.in_(sources)
+        )
+        .values(status=status)
+        .returning(
+            Order.id,
+            Order.customer_id,
+            Order.outlet_id,
+            Order.status,
+            Order.order_type,
+            Order.table_number,
+            Order.total_amount,
+            Order.time_till_ready,
+            Order.created_at
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+
+    updated = {row.id for row in moved}
+
+    # Only the leftovers need a lookup to explain why they did not move
+    current = {}
+    skipped = [i for i in order_ids if i not in updated]
+    if skipped:
+        current = dict(
+            db.session.query(Order.id, Order.status)
+            .filter(Order.id.in_(skipped), Order.outlet_id == outlet_id)
+            .all()
+        )
+
+    for row in moved:
+        kitchen_board.update(row.id, row.outlet_id, status)
+        publish_order_event("order_status", row)
+
+    results = []
+    for order_id in order_ids:
+        if order_id in updated:
+            results.append({"order_id": order_id, "outcome": "updated", "status": status})
+        elif order_id in current:
+            results.append({
+                "order_id": order_id,
+                "outcome": "invalid_transition",
+                "status": current[order_id]
+            })
+        else:
+            results.append({"order_id": order_id, "outcome": "not_found", "status": None})
+
+    return jsonify({
+        "status": status,
+        "updated": len(updated),
+        "results": results
+    }), 200
+
+
+ORDER_BULK_MAX = 200
+
+# Allowed moves for outlet staff; completed and cancelled are final
+ORDER_TRANSITIONS = {
+    "pending": {"preparing", "ready", "cancelled"},
+    "preparing": {"ready", "cancelled"},
+    "ready": {"completed"},
+    "completed": set(),
+    "cancelled": set()
+}
+
+
+# LIVE ORDER ETA (CUSTOMER OR OUTLET)
+# Minutes until ready from the outlet's kitchen queue; orders that already
+# left the queue (ready, completed, cancelled) report 0. Active orders never
+# do, even when this worker has not seen them yet.
+@order_bp.route("/<int:order_id>/eta", methods=["GET"])
+@jwt_required()
+def get_order_eta(order_id):
+    identity = get_jwt_identity()
+    user_id = identity["id"]
+    role = str(identity.get("role", "")).lower()
+
+    ticket = kitchen_board.lookup(order_id)
+    if ticket is None:
+        order = Order.query.get(order_id)
+        if not order:
+            return jsonify({"error": "Order not found"}), 404
+        ticket = {
+            "outlet_id": order.outlet_id,
+            "customer_id": order.customer_id,
+            "status": order.status
+        }
+
+    if role == "customer":
+        if ticket["customer_id"] != user_id:
+            return jsonify({"error": "Forbidden"}), 403
+    elif role in ["outlet", "owner"]:
+        if ticket["outlet_id"] != user_id:
+            return jsonify({"error": "Forbidden"}), 403
+    else:
+        return jsonify({"error": "Forbidden"}), 403
+
+    minutes = 0
+    if ticket["status"] in ACTIVE_STATUSES:
+        minutes = kitchen_board.active_estimate(order_id, ticket["outlet_id"])
+
+    return jsonify({
+        "order_id": order_id,
+        "status": ticket["status"],
+        "time_till_ready": minutes,
+        "estimated_ready_at": ready_at(minutes)
+    }), 200
+
+
+# ORDER EVENTS (SERVER-SENT EVENTS)
+# Customers receive their own orders, outlets the orders placed with them.
+# Reconnecting clients resume from Last-Event-ID (or ?last_event_id=).
+@order_bp.route("/stream", methods=["GET"])
+@jwt_required()
+def stream_orders():
+    identity = get_jwt_identity()
+    user_id = identity["id"]
+    role = str(identity.get("role", "")).lower()
+
+    if role == "customer":
+        channel = f"customer:{user_id}"
+    elif role in ["outlet", "owner"]:
+        channel = f"outlet:{user_id}"
+    else:
+        return jsonify({"error": "Forbidden"}), 403
+
+    last_event_id = parse_last_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    )
+
+    return Response(
+        event_broker.stream([channel], last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,15 +1,34 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import (
     jwt_required,
     get_jwt_identity
 )
 
 from datetime import datetime, timedelta
-
-from extensions import db
-from models import Reservation, FoodCourtTable
-
-from utils import customer_required, outlet_required
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+
+from extensions import db, catalog_cache
+from models import Reservation, FoodCourtTable, Outlet
+
+from utils import (
+    customer_required,
+    outlet_required,
+    idempotent,
+    encode_cursor,
+    decode_cursor,
+    filter_time_range
+)
+from availability import (
+    RESERVATION_DURATION,
+    best_fit_table,
+    is_booking_conflict,
+    table_availability,
+    day_grid,
+    grid_scope,
+    invalidate_day
+)
 
 
 reservation_bp = Blueprint(
@@ -31,24 +50,16 @@ def get_tables():
         query = query.filter_by(outlet_id=outlet_id)
     
     tables = query.all()
+    availability = {}
     
     # If date and time are provided, check availability
     if date_str and time_str:
         try:
             target_time = datetime.fromisoformat(f"{date_str}T{time_str}:00")
-            duration = timedelta(hours=1)
-            end_target = target_time + duration
+            end_target = target_time + RESERVATION_DURATION
             
-            for table in tables:
-                # Check for confirmed/pending reservations in this window
-                overlapping = Reservation.query.filter(
-                    Reservation.table_id == table.id,
-                    Reservation.status.in_(["pending", "confirmed"]),
-                    Reservation.time_reserved_for < end_target,
-                    Reservation.end_time > target_time
-                ).first()
-                if overlapping:
-                    table.is_available = False
+            # One query for every table with a confirmed/pending reservation in this window
+            availability = table_availability(tables, target_time, end_target, outlet_id=outlet_id)
         except ValueError:
             pass # Invalid format, skip availability check
 
@@ -57,12 +68,47 @@ def get_tables():
             "id": t.id,
             "table_number": t.table_number,
             "capacity": t.capacity,
-            "is_available": t.is_available,
+            "is_available": availability.get(t.id, t.is_available),
             "outlet_id": t.outlet_id
         } for t in tables
     ]), 200
 
 
+# DAY AVAILABILITY GRID (PUBLIC)
+# Free intervals and bookable start times per table for one outlet and day:
+# ?outlet_id=1&date=2025-01-31[&slot_minutes=15]
+@reservation_bp.route("/availability", methods=["GET"])
+def get_day_availability():
+    outlet_id = request.args.get("outlet_id", type=int)
+    date_str = request.args.get("date")
+
+    if not outlet_id or not date_str:
+        return jsonify({"error": "outlet_id and date are required"}), 400
+
+    try:
+        day = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "Invalid date, expected YYYY-MM-DD"}), 400
+
+    config = current_app.config
+    slot_minutes = request.args.get("slot_minutes", config["RESERVATION_SLOT_MINUTES"], type=int)
+    if not slot_minutes or slot_minutes < 5 or slot_minutes > 240:
+        return jsonify({"error": "slot_minutes must be between 5 and 240"}), 400
+
+    opening, closing = (
+        datetime.strptime(value, "%H:%M").time()
+        for value in config["RESERVATION_OPENING_HOURS"]
+    )
+
+    grid = catalog_cache.get_or_set(
+        grid_scope(outlet_id, day),
+        f"grid:{slot_minutes}:{opening}-{closing}",
+        lambda: day_grid(outlet_id, day, opening, closing, slot_minutes)
+    )
+
+    return jsonify(grid), 200
+
+
 # CREATE RESERVATION (CUSTOMER ONLY)
 
 @reservation_bp.route("", methods=["POST"])
@@ -72,7 +118,8 @@ def create_reservation():
 
     data = request.get_json() or {}
 
-    required = ["outlet_id", "table_id", "time_reserved_for", "number_of_guests"]
+    # table_id is optional: without it the best-fitting free table is picked
+    required = ["outlet_id", "time_reserved_for", "number_of_guests"]
 
     for field in required:
         if not data.get(field):
@@ -97,11 +144,6 @@ def create_reservation():
             "error": "Invalid time_reserved_for format"
         }), 400
 
-    # Validate table
-    table = FoodCourtTable.query.get(data["table_id"])
-    if not table:
-        return jsonify({"error": "Table not found"}), 404
-
     # Validate outlet
     outlet_id = data.get("outlet_id")
     # Table must belong to the context of the outlet (not explicitly modeled but assumed for flow)
@@ -109,8 +151,38 @@ def create_reservation():
     # Time-based availability check (Block overlapping bookings on SAME TABLE in SAME OUTLET)
     # The requirement says "Table 1 is booked... If Customer B attempts to book THE SAME TABLE..."
     # We'll use a 1-hour window if end_time isn't provided, or calculate end_time.
-    duration = timedelta(hours=1)
-    end_time = time_reserved_for + duration
+    end_time = time_reserved_for + RESERVATION_DURATION
+
+    # Validate guests
+    try:
+        guests = int(data["number_of_guests"])
+        if guests < 1 or guests > 6:
+            return jsonify({
+                "error": "Number of guests must be between 1 and 6"
+            }), 400
+    except ValueError:
+        return jsonify({
+            "error": "Invalid number_of_guests"
+        }), 400
+
+    auto_assigned = not data.get("table_id")
+    if auto_assigned:
+        try:
+            outlet_id = int(outlet_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "Invalid outlet_id"}), 400
+
+        table_id = best_fit_table(outlet_id, guests, time_reserved_for, end_time)
+        if not table_id:
+            return jsonify({
+                "error": f"No table for {guests} is free at that time. Please select another time."
+            }), 409
+        data["table_id"] = table_id
+
+    # Validate table
+    table = FoodCourtTable.query.get(data["table_id"])
+    if not table:
+        return jsonify({"error": "Table not found"}), 404
     
     # Check for overlaps
     overlapping = Reservation.query.filter(
@@ -127,38 +199,64 @@ def create_reservation():
             "error": f"Table {table.table_number} is already reserved between {overlapping.time_reserved_for.strftime('%H:%M')} and {overlapping.end_time.strftime('%H:%M')}. Please select another table or time."
         }), 400
 
-    # Validate guests
-    try:
-        guests = int(data["number_of_guests"])
-        if guests < 1 or guests > 6:
-            return jsonify({
-                "error": "Number of guests must be between 1 and 6"
-            }), 400
-    except ValueError:
-        return jsonify({
-            "error": "Invalid number_of_guests"
-        }), 400
+    # An auto-assigned booking that loses its table to a concurrent one moves
+    # on to the next best fit, a few tables at most
+    tried = set()
+    while True:
+        reservation = Reservation(
+            customer_id=customer_id,
+            outlet_id=outlet_id,
+            table_id=table.id,
+            time_reserved_for=time_reserved_for,
+            end_time=end_time,
+            number_of_guests=guests,
+            status="pending",
+            reservation_fee=5.00
+        )
 
-    reservation = Reservation(
-        customer_id=customer_id,
-        outlet_id=outlet_id,
-        table_id=table.id,
-        time_reserved_for=time_reserved_for,
-        end_time=end_time,
-        number_of_guests=guests,
-        status="pending",
-        reservation_fee=5.00
-    )
+        db.session.add(reservation)
 
-    db.session.add(reservation)
-    db.session.commit()
+        # The check above is advisory; a booking that raced past it is refused here
+        error = _commit_booking()
+        if not error:
+            break
+
+        tried.add(table.id)
+        if not auto_assigned or len(tried) >= AUTO_ASSIGN_ATTEMPTS:
+            return error
+
+        table_id = best_fit_table(outlet_id, guests, time_reserved_for, end_time, exclude=tried)
+        if not table_id:
+            return error
+        table = FoodCourtTable.query.get(table_id)
+
+    invalidate_day(table.outlet_id, reservation.time_reserved_for)
 
     return jsonify({
         "message": "Reservation created",
-        "reservation_id": reservation.id
+        "reservation_id": reservation.id,
+        "table_id": table.id,
+        "table_number": table.table_number
     }), 201
 
 
+AUTO_ASSIGN_ATTEMPTS = 3
+
+
+def _commit_booking():
+    """Commit, turning a double-booking guard violation into a 409 response."""
+    try:
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not is_booking_conflict(e):
+            raise
+        return jsonify({
+            "error": "This table is already reserved for that time. Please select another table or time."
+        }), 409
+    return None
+
+
 # GET SINGLE RESERVATION (OWNER ONLY)
 
 @reservation_bp.route("/<int:reservation_id>", methods=["GET"])
@@ -197,6 +295,8 @@ def get_reservation(reservation_id):
 
 
 # GET MY RESERVATIONS
+# Same filters and pagination as the outlet listing; paginated responses
+# add "next_cursor".
 
 @reservation_bp.route("/my", methods=["GET"])
 @jwt_required()
@@ -205,11 +305,16 @@ def get_my_reservations():
 
     identity = get_jwt_identity()
 
-    reservations = Reservation.query.filter_by(
+    query = Reservation.query.filter_by(
         customer_id=identity["id"]
-    ).all()
+    )
 
-    return jsonify({
+    try:
+        reservations, next_cursor = _list_reservations(query, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = {
         "reservations": [
             {
                 "id": r.id,
@@ -226,7 +331,54 @@ def get_my_reservations():
             }
             for r in reservations
         ]
-    }), 200
+    }
+
+    if next_cursor is not False:
+        result["next_cursor"] = next_cursor
+
+    return jsonify(result), 200
+
+
+RESERVATION_PAGE_SIZE = 25
+RESERVATION_PAGE_MAX = 100
+
+
+def _list_reservations(query, args):
+    """
+    Filter (status, from, to on time_reserved_for), eager-load and page.
+
+    Returns (reservations, next_cursor); next_cursor is False when the
+    request did not ask for pagination (no `limit` / `cursor`).
+    """
+    if args.get("status"):
+        query = query.filter(Reservation.status == args["status"])
+
+    query = filter_time_range(query, Reservation.time_reserved_for, args)
+
+    if args.get("cursor"):
+        reserved_for, reservation_id = decode_cursor(args["cursor"], datetime, int)
+        query = query.filter(
+            tuple_(Reservation.time_reserved_for, Reservation.id) < (reserved_for, reservation_id)
+        )
+
+    query = query.options(
+        joinedload(Reservation.outlet).load_only(Outlet.id, Outlet.outlet_name),
+        joinedload(Reservation.table).load_only(FoodCourtTable.id, FoodCourtTable.table_number)
+    ).order_by(Reservation.time_reserved_for.desc(), Reservation.id.desc())
+
+    if "limit" not in args and "cursor" not in args:
+        return query.all(), False
+
+    limit = args.get("limit", RESERVATION_PAGE_SIZE, type=int) or RESERVATION_PAGE_SIZE
+    limit = max(1, min(limit, RESERVATION_PAGE_MAX))
+    # One extra row tells us whether there is a next page
+    reservations = query.limit(limit + 1).all()
+    if len(reservations) <= limit:
+        return reservations, None
+
+    reservations = reservations[:limit]
+    last = reservations[-1]
+    return reservations, encode_cursor(last.time_reserved_for, last.id)
 
 
 # UPDATE STATUS (CUSTOMER: CANCEL ONLY, OUTLET: ANY)
@@ -260,7 +412,12 @@ def update_reservation_status(reservation_id):
         return jsonify({"error": "Forbidden"}), 403
 
     reservation.status = status
-    db.session.commit()
+
+    error = _commit_booking()
+    if error:
+        return error
+
+    invalidate_day(reservation.table.outlet_id if reservation.table else None, reservation.time_reserved_for)
 
     return jsonify({
         "message": f"Reservation {status}",
@@ -272,6 +429,7 @@ def update_reservation_status(reservation_id):
 # CONFIRM RESERVATION (AFTER PAYMENT)
 @reservation_bp.route("/<int:reservation_id>/confirm", methods=["PUT", "PATCH"])
 @jwt_required()
+@idempotent
 def confirm_reservation(reservation_id):
     reservation = Reservation.query.get(reservation_id)
     if not reservation:
@@ -333,7 +491,13 @@ def reassign_reservation(reservation_id):
     res.table_id = new_table.id
     res.is_reassigned = True
     
-    db.session.commit()
+    error = _commit_booking()
+    if error:
+        return error
+
+    invalidate_day(new_table.outlet_id, res.time_reserved_for)
+    if old_table and old_table.outlet_id != new_table.outlet_id:
+        invalidate_day(old_table.outlet_id, res.time_reserved_for)
     return jsonify({
         "message": "Table reassigned successfully",
         "new_table_number": new_table.table_number
@@ -341,6 +505,9 @@ def reassign_reservation(reservation_id):
 
 
 # GET ALL RESERVATIONS (OUTLET OWNER ONLY)
+# Scoped to the caller's outlet. Optional filters: status, from, to (on
+# time_reserved_for). Passing `limit` or `cursor` switches to keyset
+# pagination, newest first, wrapped in {"reservations", "next_cursor"}.
 @reservation_bp.route("", methods=["GET"])
 @jwt_required()
 def get_all_reservations():
@@ -350,9 +517,15 @@ def get_all_reservations():
     if role not in ["outlet", "owner"]:
         return jsonify({"error": "Forbidden"}), 403
 
-    reservations = Reservation.query.order_by(Reservation.time_reserved_for.desc()).all()
+    # Outlets only see bookings made with them
+    query = Reservation.query.filter(Reservation.outlet_id == identity["id"])
 
-    return jsonify([
+    try:
+        reservations, next_cursor = _list_reservations(query, request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = [
         {
             "id": r.id,
             "customer_id": r.customer_id,
@@ -366,4 +539,12 @@ def get_all_reservations():
             "previous_table_number": r.previous_table_number,
             "created_at": r.created_at.isoformat() if r.created_at else None
         } for r in reservations
-    ]), 200
\ No newline at end of file
+    ]
+
+    if next_cursor is False:
+        return jsonify(result), 200
+
+    return jsonify({
+        "reservations": result,
+        "next_cursor": next_cursor
+    }), 200
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+from extensions import db
+from models import MenuItemSales, MenuItemDailySales
+
+
+# SALES COUNTERS
+#
+# Per-item totals plus one row per item and day for windowed rankings.
+# Writes are upserts that add to the existing counters, so concurrent orders
+# for the same item never overwrite each other.
+
+def _insert(model):
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def record_sales(lines, when=None):
+    """Add order lines [(menu_item_id, quantity)] to the counters."""
+    day = (when or datetime.utcnow()).date()
+
+    totals = defaultdict(lambda: [0, 0])
+    for menu_item_id, quantity in lines:
+        totals[menu_item_id][0] += 1
+        totals[menu_item_id][1] += quantity
+
+    if not totals:
+        return
+
+    now = datetime.utcnow()
+
+    stmt = _insert(MenuItemSales).values([
+        {
+            "menu_item_id": item_id,
+            "order_count": count,
+            "quantity_sold": quantity,
+            "updated_at": now
+        }
+        for item_id, (count, quantity) in sorted(totals.items())
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["menu_item_id"],
+        set_={
+            "order_count": MenuItemSales.order_count + stmt.excluded.order_count,
+            "quantity_sold": MenuItemSales.quantity_sold + stmt.excluded.quantity_sold,
+            "updated_at": stmt.excluded.updated_at
+        }
+    ))
+
+    stmt = _insert(MenuItemDailySales).values([
+        {
+            "menu_item_id": item_id,
+            "day": day,
+            "order_count": count,
+            "quantity_sold": quantity
+        }
+        for item_id, (count, quantity) in sorted(totals.items())
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=["menu_item_id", "day"],
+        set_={
+            "order_count": MenuItemDailySales.order_count + stmt.excluded.order_count,
+            "quantity_sold": MenuItemDailySales.quantity_sold + stmt.excluded.quantity_sold
+        }
+    ))
+
+
+def top_sellers(limit, days=None):
+    """Return the ids of the best selling items, best first."""
+    if days:
+        since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+        total = func.sum(MenuItemDailySales.order_count)
+        rows = (
+            db.session.query(MenuItemDailySales.menu_item_id)
+            .filter(MenuItemDailySales.day >= since)
+            .group_by(MenuItemDailySales.menu_item_id)
+            .order_by(total.desc(), MenuItemDailySales.menu_item_id)
+            .limit(limit)
+            .all()
+        )
+    else:
+        rows = (
+            db.session.query(MenuItemSales.menu_item_id)
+            .filter(MenuItemSales.order_count > 0)
+            .order_by(MenuItemSales.order_count.desc(), MenuItemSales.menu_item_id)
+            .limit(limit)
+            .all()
+        )
+    return [row[0] for row in rows]
+
+
+# Archived lines may outlive their menu item, the joins below skip those
+ORDER_ITEM_HISTORY = (
+    "SELECT order_id, menu_item_id, quantity FROM order_items "
+    "UNION ALL SELECT order_id, menu_item_id, quantity FROM order_items_archive"
+)
+ORDER_HISTORY = (
+    "SELECT id, created_at FROM orders "
+    "UNION ALL SELECT id, created_at FROM orders_archive"
+)
+
+
+def rebuild_sales():
+    """Recompute every counter from live and archived order items (backfill / repair)."""
+    db.session.query(MenuItemDailySales).delete()
+    db.session.query(MenuItemSales).delete()
+
+    db.session.execute(text(
+        "INSERT INTO menu_item_sales (menu_item_id, order_count, quantity_sold, updated_at) "
+        "SELECT oi.menu_item_id, COUNT(*), SUM(oi.quantity), :now "
+        "FROM (" + ORDER_ITEM_HISTORY + ") oi "
+        "JOIN menu_items mi ON mi.id = oi.menu_item_id "
+        "GROUP BY oi.menu_item_id"
+    ), {"now": datetime.utcnow()})
+
+    db.session.execute(text(
+        "INSERT INTO menu_item_daily_sales (menu_item_id, day, order_count, quantity_sold) "
+        "SELECT oi.menu_item_id, DATE(o.created_at), COUNT(*), SUM(oi.quantity) "
+        "FROM (" + ORDER_ITEM_HISTORY + ") oi "
+        "JOIN (" + ORDER_HISTORY + ") o ON o.id = oi.order_id "
+        "JOIN menu_items mi ON mi.id = oi.menu_item_id "
+        "GROUP BY oi.menu_item_id, DATE(o.created_at)"
+    ))
+
+    return db.session.query(func.count(MenuItemSales.menu_item_id)).scalar()
@@ -0,0 +1,194 @@
+import re
+import time
+
+from sqlalchemy import DDL, event, inspect, text, bindparam, or_
+
+from extensions import db
+from models import MenuItem, Outlet
+
+
+# MENU SEARCH INDEX
+#
+# One document per menu item covering item_name, description, category and
+# the owning outlet's name. Postgres keeps a weighted tsvector behind a GIN
+# index, SQLite uses an FTS5 virtual table keyed by the menu item id. The
+# index is written in the same transaction as the menu item itself.
+
+SEARCH_TABLE = "menu_search"
+MAX_TERMS = 8
+READY_RECHECK_SECONDS = 30
+
+# title > outlet > category > description
+SQLITE_WEIGHTS = "10.0, 2.0, 4.0, 6.0"
+
+PG_DOCUMENT = """
+    setweight(to_tsvector('simple', coalesce(m.item_name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(o.outlet_name, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(m.category, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(m.description, '')), 'C')
+"""
+
+
+SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    "item_name, description, category, outlet_name, outlet_id UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+]
+
+PG_DDL = [
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+    "menu_item_id INTEGER PRIMARY KEY REFERENCES menu_items(id) ON DELETE CASCADE, "
+    "document TSVECTOR NOT NULL)",
+    f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)",
+]
+
+# Created/dropped together with the ORM tables (db.create_all / drop_all)
+for statement in SQLITE_DDL:
+    event.listen(db.metadata, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+
+for statement in PG_DDL:
+    event.listen(db.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+event.listen(db.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+
+def _terms(query):
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+class MenuSearchIndex:
+
+    def __init__(self):
+        self._ready = False
+        self._checked_at = None
+
+    @property
+    def dialect(self):
+        return db.engine.dialect.name
+
+    def is_ready(self, recheck=False):
+        # Databases created before the index existed need `flask search-reindex`
+        # first. Once found the index is trusted for good; until then searches
+        # look again every READY_RECHECK_SECONDS and writes (rare) every time,
+        # so running processes pick it up without a restart.
+        if self._ready:
+            return True
+
+        now = time.monotonic()
+        if recheck or self._checked_at is None or now - self._checked_at >= READY_RECHECK_SECONDS:
+            self._checked_at = now
+            self._ready = (
+                self.dialect in ("sqlite", "postgresql")
+                and inspect(db.engine).has_table(SEARCH_TABLE)
+            )
+        return self._ready
+
+    def create(self):
+        statements = {"sqlite": SQLITE_DDL, "postgresql": PG_DDL}.get(self.dialect, [])
+        for statement in statements:
+            db.session.execute(text(statement))
+        self._ready = bool(statements)
+
+    # WRITES
+
+    def upsert(self, item_ids):
+        item_ids = list(item_ids)
+        if not item_ids or not self.is_ready(recheck=True):
+            return
+
+        if self.dialect == "sqlite":
+            self.remove(item_ids)
+            db.session.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} "
+                    "(rowid, item_name, description, category, outlet_name, outlet_id) "
+                    "SELECT m.id, m.item_name, coalesce(m.description, ''), m.category, "
+                    "coalesce(o.outlet_name, ''), m.outlet_id "
+                    "FROM menu_items m LEFT JOIN outlets o ON o.id = m.outlet_id "
+                    "WHERE m.id IN :ids"
+                ).bindparams(bindparam("ids", expanding=True)),
+                {"ids": item_ids}
+            )
+        else:
+            db.session.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} (menu_item_id, document) "
+                    f"SELECT m.id, {PG_DOCUMENT} "
+                    "FROM menu_items m LEFT JOIN outlets o ON o.id = m.outlet_id "
+                    "WHERE m.id IN :ids "
+                    "ON CONFLICT (menu_item_id) DO UPDATE SET document = EXCLUDED.document"
+                ).bindparams(bindparam("ids", expanding=True)),
+                {"ids": item_ids}
+            )
+
+    def remove(self, item_ids):
+        item_ids = list(item_ids)
+        if not item_ids or not self.is_ready(recheck=True):
+            return
+
+        key = "rowid" if self.dialect == "sqlite" else "menu_item_id"
+        db.session.execute(
+            text(f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": item_ids}
+        )
+
+    def rebuild(self):
+        db.session.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+        ids = db.session.execute(text("SELECT id FROM menu_items")).scalars().all()
+        self.upsert(ids)
+        return len(ids)
+
+    # READS
+
+    def search(self, query, limit=20, outlet_id=None):
+        """Return [(menu_item_id, score)] best match first."""
+        terms = _terms(query)
+        if not terms:
+            return []
+
+        if not self.is_ready():
+            return self._search_fallback(terms, limit, outlet_id)
+
+        params = {"limit": limit, "outlet_id": outlet_id}
+
+        if self.dialect == "sqlite":
+            params["q"] = " ".join(f'"{t}"*' for t in terms)
+            rows = db.session.execute(text(
+                f"SELECT rowid, -bm25({SEARCH_TABLE}, {SQLITE_WEIGHTS}) AS score "
+                f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :q "
+                + ("AND outlet_id = :outlet_id " if outlet_id else "")
+                + "ORDER BY score DESC LIMIT :limit"
+            ), params)
+        else:
+            params["q"] = " & ".join(f"{t}:*" for t in terms)
+            rows = db.session.execute(text(
+                "SELECT s.menu_item_id, ts_rank(s.document, q) AS score "
+                f"FROM {SEARCH_TABLE} s "
+                "JOIN menu_items m ON m.id = s.menu_item_id, "
+                "to_tsquery('simple', :q) q "
+                "WHERE s.document @@ q "
+                + ("AND m.outlet_id = :outlet_id " if outlet_id else "")
+                + "ORDER BY score DESC, s.menu_item_id LIMIT :limit"
+            ), params)
+
+        return [(row[0], float(row[1])) for row in rows]
+
+    def _search_fallback(self, terms, limit, outlet_id):
+        # No index available: unranked LIKE match, still done in SQL
+        query = db.session.query(MenuItem.id).join(Outlet, Outlet.id == MenuItem.outlet_id)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.filter(or_(
+                MenuItem.item_name.ilike(pattern),
+                MenuItem.description.ilike(pattern),
+                MenuItem.category.ilike(pattern),
+                Outlet.outlet_name.ilike(pattern)
+            ))
+        if outlet_id:
+            query = query.filter(MenuItem.outlet_id == outlet_id)
+
+        return [(row[0], 0.0) for row in query.order_by(MenuItem.id).limit(limit)]
+
+
+search_index = MenuSearchIndex()
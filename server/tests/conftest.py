@@ -0,0 +1,97 @@
+import os
+import sys
+from collections import OrderedDict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module
+from extensions import db, catalog_cache, event_broker, idempotency_store
+from kitchen import kitchen_board
+from search import search_index
+from models import Customer, Outlet, MenuItem, FoodCourtTable
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.Config, "SQLALCHEMY_DATABASE_URI", "sqlite:///" + str(tmp_path / "test.db"))
+
+    # The extensions are module singletons: give every test empty ones
+    monkeypatch.setattr(catalog_cache, "backend", None)
+    monkeypatch.setattr(event_broker, "_subscribers", {})
+    monkeypatch.setattr(event_broker, "_history", OrderedDict())
+    monkeypatch.setattr(idempotency_store, "_entries", OrderedDict())
+    monkeypatch.setattr(kitchen_board, "_queues", {})
+    monkeypatch.setattr(kitchen_board, "_owners", {})
+    monkeypatch.setattr(search_index, "_ready", False)
+    monkeypatch.setattr(search_index, "_checked_at", None)
+
+    app = app_module.create_app()
+    app.config["TESTING"] = True
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def outlet(app):
+    outlet = Outlet(owner_name="Ann", outlet_name="Nairobi Grill", email="ann@x.com", password="secret1", cuisine_type="Kenyan")
+    db.session.add(outlet)
+    db.session.flush()
+
+    for i in range(6):
+        db.session.add(MenuItem(
+            outlet_id=outlet.id,
+            item_name=f"Nyama Choma {i}",
+            category="Grill",
+            price=100 + i,
+            preparation_time=10 + i
+        ))
+
+    db.session.commit()
+    return outlet
+
+
+@pytest.fixture
+def customer(app):
+    customer = Customer(email="cee@x.com", password="secret1", first_name="Cee", last_name="Dee")
+    db.session.add(customer)
+    db.session.commit()
+    return customer
+
+
+@pytest.fixture
+def tables(outlet):
+    """The outlet's tables, seating 2, 4 and 6."""
+    tables = [
+        FoodCourtTable(outlet_id=outlet.id, table_number=n, capacity=capacity)
+        for n, capacity in enumerate([2, 4, 6], start=1)
+    ]
+    db.session.add_all(tables)
+    db.session.commit()
+    return tables
+
+
+@pytest.fixture
+def make_client(app):
+    """Test client logged in as the given JWT identity."""
+    def make(identity):
+        client = app.test_client()
+        client.set_cookie("access_token_cookie", create_access_token(identity=identity))
+        return client
+    return make
+
+
+@pytest.fixture
+def customer_client(make_client, customer):
+    return make_client({"id": customer.id, "role": "customer"})
+
+
+@pytest.fixture
+def outlet_client(make_client, outlet):
+    return make_client({"id": outlet.id, "role": "outlet"})
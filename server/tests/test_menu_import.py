@@ -0,0 +1,88 @@
+from extensions import db
+from models import MenuItem
+
+
+def _import(client, rows):
+    return client.post("/items/bulk", json=rows)
+
+
+def _items(outlet):
+    return {m.item_name: m for m in MenuItem.query.filter_by(outlet_id=outlet.id)}
+
+
+def test_import_inserts_new_names_and_updates_known_ones(outlet_client, outlet):
+    by_name = _items(outlet)
+    kept = by_name["Nyama Choma 1"]
+
+    response = _import(outlet_client, [
+        {"item_name": "Pilau", "price": 350, "category": "Rice"},
+        {"item_name": "Nyama Choma 0", "price": 999, "category": "Grill"},
+        {"id": kept.id, "item_name": "Nyama Choma Special", "price": 120, "category": "Grill"}
+    ])
+
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    assert (body["created"], body["updated"]) == (1, 2)
+    assert [(r["row"], r["action"]) for r in body["items"]] == [(1, "created"), (2, "updated"), (3, "updated")]
+
+    by_name = _items(outlet)
+    assert len(by_name) == 7
+    assert by_name["Nyama Choma 0"].price == 999
+    assert by_name["Nyama Choma Special"].id == kept.id
+    assert "Nyama Choma 1" not in by_name
+
+    pilau = by_name["Pilau"]
+    assert (pilau.description, pilau.is_available, pilau.preparation_time) == (None, True, 15)
+
+
+def test_import_update_keeps_fields_the_row_leaves_out(outlet_client, outlet):
+    item = _items(outlet)["Nyama Choma 2"]
+    item.description = "Goat ribs"
+    item.is_available = False
+    db.session.commit()
+
+    response = outlet_client.post(
+        "/items/bulk",
+        data="item_name,price,category,description,is_available,preparation_time\nNyama Choma 2,150,Grill,,,\n",
+        content_type="text/csv"
+    )
+
+    assert response.status_code == 200, response.get_json()
+    db.session.refresh(item)
+    assert (item.price, item.description, item.is_available, item.preparation_time) == (150, "Goat ribs", False, 12)
+
+
+def test_import_rejects_the_whole_batch_on_row_errors(outlet_client, outlet):
+    by_name = _items(outlet)
+
+    response = _import(outlet_client, [
+        {"item_name": "Pilau", "price": 350, "category": "Rice"},
+        {"item_name": "Pilau", "price": 300, "category": "Rice"},
+        {"item_name": "Chapati", "price": "cheap", "category": "Bread"},
+        {"id": 9999, "item_name": "Ghost", "price": 1, "category": "Grill"},
+        # rename onto another item's name
+        {"id": by_name["Nyama Choma 3"].id, "item_name": "Nyama Choma 4", "price": 1, "category": "Grill"},
+        # same item by id and, through its name, by the next row
+        {"id": by_name["Nyama Choma 5"].id, "item_name": "Nyama Choma Five", "price": 1, "category": "Grill"},
+        {"item_name": "Nyama Choma 5", "price": 2, "category": "Grill"}
+    ])
+
+    assert response.status_code == 400
+    assert {e["row"]: e["error"] for e in response.get_json()["errors"]} == {
+        2: "Duplicate item_name in import",
+        3: "Invalid price",
+        4: "Menu item not found",
+        5: "item_name is already used by another menu item",
+        7: "Menu item is already updated by another row"
+    }
+    assert _items(outlet).keys() == by_name.keys()
+
+
+def test_import_cannot_touch_another_outlets_items(make_client, outlet):
+    other = make_client({"id": 999, "role": "outlet"})
+    item = _items(outlet)["Nyama Choma 0"]
+
+    response = _import(other, [{"id": item.id, "item_name": "Stolen", "price": 1, "category": "Grill"}])
+
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [{"row": 1, "error": "Menu item not found"}]
@@ -0,0 +1,35 @@
+import base64
+
+from models import MenuItem
+
+
+def _ids(page):
+    return [item["id"] for item in page["items"]]
+
+
+def test_menu_items_pages_with_cursors(app, outlet):
+    client = app.test_client()
+    all_ids = [m.id for m in MenuItem.query.order_by(MenuItem.outlet_id, MenuItem.id)]
+
+    first = client.get("/menu_items?limit=4").get_json()
+    second = client.get(f"/menu_items?limit=4&cursor={first['next_cursor']}").get_json()
+
+    assert _ids(first) + _ids(second) == all_ids
+    assert second["next_cursor"] is None
+
+
+def test_menu_items_accepts_cursors_from_before_the_shared_helpers(app, outlet):
+    client = app.test_client()
+    all_ids = [m.id for m in MenuItem.query.order_by(MenuItem.outlet_id, MenuItem.id)]
+
+    # Old format: base64 of "<outlet_id>:<item_id>" without padding
+    legacy = base64.urlsafe_b64encode(f"{outlet.id}:{all_ids[1]}".encode()).decode().rstrip("=")
+    response = client.get(f"/menu_items?limit=10&cursor={legacy}")
+
+    assert response.status_code == 200, response.get_json()
+    assert _ids(response.get_json()) == all_ids[2:]
+
+
+def test_menu_items_rejects_garbage_cursors(app, outlet):
+    response = app.test_client().get("/menu_items?limit=4&cursor=bm9wZQ")
+    assert response.status_code == 400
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import MenuItem
+
+
+@pytest.fixture
+def count_queries(app):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _order(client, outlet, lines):
+    item_ids = [m.id for m in MenuItem.query.filter_by(outlet_id=outlet.id).order_by(MenuItem.id)]
+    return client.post("/orders", json={
+        "outlet_id": outlet.id,
+        "table_number": 3,
+        "items": [{"menu_item_id": item_ids[i], "quantity": 2} for i in range(lines)]
+    })
+
+
+def test_create_order_query_count_does_not_grow_with_cart(customer_client, outlet, count_queries):
+    # First order warms the kitchen queue and the sales counters
+    assert _order(customer_client, outlet, 1).status_code == 201
+
+    counts = {}
+    for lines in (1, 3, 6):
+        count_queries.clear()
+        response = _order(customer_client, outlet, lines)
+        assert response.status_code == 201, response.get_json()
+        counts[lines] = len(count_queries)
+
+    assert counts[1] == counts[3] == counts[6], counts
@@ -0,0 +1,187 @@
+import pytest
+
+from extensions import db
+from kitchen import kitchen_board
+from models import MenuItem, Order, OrderItem
+
+
+def _item_ids(outlet):
+    return [m.id for m in MenuItem.query.filter_by(outlet_id=outlet.id).order_by(MenuItem.id)]
+
+
+def _place(client, outlet, headers=None, **body):
+    return client.post("/orders", headers=headers or {}, json=dict({
+        "outlet_id": outlet.id,
+        "table_number": 3,
+        "items": [{"menu_item_id": _item_ids(outlet)[0]}]
+    }, **body))
+
+
+def test_create_order_accepts_string_menu_item_ids(customer_client, outlet):
+    first, second = _item_ids(outlet)[:2]
+
+    response = customer_client.post("/orders", json={
+        "outlet_id": outlet.id,
+        "table_number": 3,
+        "items": [
+            {"menu_item_id": str(first), "quantity": 2},
+            {"menu_item_id": str(second)}
+        ]
+    })
+
+    assert response.status_code == 201, response.get_json()
+    lines = OrderItem.query.filter_by(order_id=response.get_json()["order_id"]).all()
+    assert sorted((line.menu_item_id, line.quantity) for line in lines) == [(first, 2), (second, 1)]
+
+
+def test_create_order_rejects_malformed_menu_item_ids(customer_client, outlet):
+    for bad in (["1"], {"id": 1}, "abc", None):
+        response = customer_client.post("/orders", json={
+            "outlet_id": outlet.id,
+            "table_number": 3,
+            "items": [{"menu_item_id": bad}]
+        })
+        assert response.status_code == 400, (bad, response.get_json())
+        assert response.get_json()["error"] == "Invalid menu_item_id"
+
+
+# IDEMPOTENT REPLAY
+
+def test_retried_order_is_replayed_not_placed_again(customer_client, outlet):
+    headers = {"Idempotency-Key": "cart-1"}
+
+    first = _place(customer_client, outlet, headers)
+    retry = _place(customer_client, outlet, headers)
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert Order.query.count() == 1
+
+
+def test_idempotency_key_reused_for_another_body_is_refused(customer_client, outlet):
+    headers = {"Idempotency-Key": "cart-1"}
+
+    assert _place(customer_client, outlet, headers).status_code == 201
+    response = _place(customer_client, outlet, headers, table_number=7)
+
+    assert response.status_code == 422
+    assert Order.query.count() == 1
+
+
+def test_idempotency_keys_are_scoped_to_the_caller(make_client, customer_client, outlet):
+    # Orders only need the customer id, no account row
+    other = make_client({"id": 999, "role": "customer"})
+    headers = {"Idempotency-Key": "cart-1"}
+
+    assert _place(customer_client, outlet, headers).status_code == 201
+    response = _place(other, outlet, headers)
+
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert Order.query.count() == 2
+
+
+# ORDER STATUS TRANSITIONS
+
+@pytest.fixture
+def orders(customer_client, outlet):
+    return [_place(customer_client, outlet).get_json()["order_id"] for _ in range(4)]
+
+
+def _bulk(client, order_ids, status, **extra):
+    return client.patch("/orders/status", json=dict({"order_ids": order_ids, "status": status}, **extra))
+
+
+def _outcomes(response):
+    return {r["order_id"]: (r["outcome"], r["status"]) for r in response.get_json()["results"]}
+
+
+def test_bulk_status_follows_the_transition_rules(outlet_client, orders):
+    a, b, c, d = orders
+
+    response = _bulk(outlet_client, [a, b], "preparing")
+    assert response.get_json()["updated"] == 2
+
+    # pending / preparing orders cannot skip straight to completed
+    response = _bulk(outlet_client, [a, c], "completed")
+    assert response.get_json()["updated"] == 0
+    assert _outcomes(response) == {
+        a: ("invalid_transition", "preparing"),
+        c: ("invalid_transition", "pending")
+    }
+
+    response = _bulk(outlet_client, [a, c, 9999], "ready")
+    assert _outcomes(response) == {
+        a: ("updated", "ready"),
+        c: ("updated", "ready"),
+        9999: ("not_found", None)
+    }
+
+    # from_status narrows the sources further
+    response = _bulk(outlet_client, [b, d], "ready", from_status="preparing")
+    assert _outcomes(response) == {
+        b: ("updated", "ready"),
+        d: ("invalid_transition", "pending")
+    }
+
+    # completed is final
+    assert _bulk(outlet_client, [a], "completed").get_json()["updated"] == 1
+    assert _outcomes(_bulk(outlet_client, [a], "cancelled")) == {a: ("invalid_transition", "completed")}
+
+    assert [db.session.get(Order, i).status for i in orders] == ["completed", "ready", "ready", "pending"]
+
+
+def test_bulk_status_rejects_impossible_requests(outlet_client, orders):
+    assert _bulk(outlet_client, orders, "eaten").status_code == 400
+    assert _bulk(outlet_client, orders, "pending").status_code == 400
+    assert _bulk(outlet_client, orders, "completed", from_status="pending").status_code == 400
+    assert _bulk(outlet_client, [], "ready").status_code == 400
+    assert _bulk(outlet_client, ["1"], "ready").status_code == 400
+
+
+def test_bulk_status_only_moves_the_outlets_own_orders(make_client, orders):
+    other_outlet = make_client({"id": 999, "role": "outlet"})
+
+    response = _bulk(other_outlet, orders[:1], "preparing")
+
+    assert _outcomes(response) == {orders[0]: ("not_found", None)}
+    assert db.session.get(Order, orders[0]).status == "pending"
+
+
+def test_bulk_status_is_outlet_only(customer_client, orders):
+    assert _bulk(customer_client, orders, "ready").status_code == 403
+
+
+# LIVE ETA
+
+def test_eta_of_an_order_this_worker_missed_reloads_the_queue(customer_client, outlet):
+    order_id = _place(customer_client, outlet).get_json()["order_id"]
+    expected = customer_client.get(f"/orders/{order_id}/eta").get_json()["time_till_ready"]
+
+    # As if the order had been placed through another worker
+    queue = kitchen_board._queues[outlet.id]
+    queue.tickets.pop(order_id)
+    kitchen_board._owners.pop(order_id)
+
+    response = customer_client.get(f"/orders/{order_id}/eta")
+
+    assert response.get_json()["time_till_ready"] == expected > 0
+    assert order_id in kitchen_board._queues[outlet.id].tickets
+
+
+def test_eta_of_an_active_order_is_never_zero(customer_client, customer, outlet):
+    # No lines, so the kitchen queue never lists it: the row's quote is used
+    order = Order(customer_id=customer.id, outlet_id=outlet.id, status="preparing", total_amount=0, table_number="3", time_till_ready=0)
+    db.session.add(order)
+    db.session.commit()
+
+    response = customer_client.get(f"/orders/{order.id}/eta")
+    assert response.get_json()["time_till_ready"] == kitchen_board.buffer
+
+    order.status = "completed"
+    db.session.commit()
+
+    response = customer_client.get(f"/orders/{order.id}/eta")
+    assert response.get_json()["time_till_ready"] == 0
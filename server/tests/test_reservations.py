@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.exc import IntegrityError
+
+from availability import is_booking_conflict
+from extensions import db
+from models import Reservation
+
+
+SLOT = (datetime.utcnow() + timedelta(days=7)).replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+def _book(client, outlet, **body):
+    return client.post("/reservations", json=dict({
+        "outlet_id": outlet.id,
+        "time_reserved_for": SLOT.isoformat(),
+        "number_of_guests": 2
+    }, **body))
+
+
+def _reservation(customer, table, start=SLOT, status="pending"):
+    return Reservation(
+        customer_id=customer.id,
+        outlet_id=table.outlet_id,
+        table_id=table.id,
+        time_reserved_for=start,
+        end_time=start + timedelta(hours=1),
+        number_of_guests=2,
+        status=status
+    )
+
+
+class Race:
+    """
+    Commits a competing booking for the same table and slot just before the
+    next `count` booking commits, as a concurrent request would.
+    """
+
+    def __init__(self, count=1):
+        self.count = count
+        self.stolen = []
+
+    def before_commit(self, session):
+        if len(self.stolen) >= self.count:
+            return
+        for obj in list(session.new):
+            if isinstance(obj, Reservation):
+                with db.engine.begin() as conn:
+                    conn.execute(insert(Reservation).values(
+                        customer_id=obj.customer_id,
+                        outlet_id=obj.outlet_id,
+                        table_id=obj.table_id,
+                        time_reserved_for=obj.time_reserved_for,
+                        end_time=obj.end_time,
+                        number_of_guests=1,
+                        status="pending"
+                    ))
+                self.stolen.append(obj.table_id)
+
+
+@pytest.fixture
+def race(app):
+    race = Race()
+    event.listen(db.session, "before_commit", race.before_commit)
+    yield race
+    event.remove(db.session, "before_commit", race.before_commit)
+
+
+# DOUBLE-BOOKING GUARD
+
+def test_guard_refuses_overlapping_bookings(customer, tables):
+    db.session.add(_reservation(customer, tables[0]))
+    db.session.commit()
+
+    db.session.add(_reservation(customer, tables[0], start=SLOT + timedelta(minutes=30)))
+    with pytest.raises(IntegrityError) as error:
+        db.session.commit()
+    db.session.rollback()
+
+    assert is_booking_conflict(error.value)
+
+
+def test_guard_ignores_back_to_back_and_cancelled_bookings(customer, tables):
+    db.session.add(_reservation(customer, tables[0], status="cancelled"))
+    db.session.add(_reservation(customer, tables[0]))
+    db.session.add(_reservation(customer, tables[0], start=SLOT + timedelta(hours=1)))
+    db.session.commit()
+
+    assert Reservation.query.count() == 3
+
+
+def test_booking_that_loses_the_race_for_its_table_gets_409(customer_client, outlet, tables, race):
+    response = _book(customer_client, outlet, table_id=tables[0].id)
+
+    assert response.status_code == 409
+    assert race.stolen == [tables[0].id]
+    assert Reservation.query.count() == 1
+
+
+# AUTO-ASSIGNMENT
+
+def test_auto_assignment_picks_the_smallest_free_table(customer_client, outlet, tables):
+    seats = [
+        _book(customer_client, outlet, number_of_guests=guests).get_json()["table_id"]
+        for guests in (3, 2, 2)
+    ]
+
+    # 3 guests -> the 4-seater, 2 -> the 2-seater, then the 6-seater is all that is left
+    assert seats == [tables[1].id, tables[0].id, tables[2].id]
+
+    response = _book(customer_client, outlet, number_of_guests=1)
+    assert response.status_code == 409
+
+
+def test_auto_assignment_retries_the_next_table_after_losing_a_race(customer_client, outlet, tables, race):
+    response = _book(customer_client, outlet)
+
+    assert response.status_code == 201, response.get_json()
+    assert race.stolen == [tables[0].id]
+    assert response.get_json()["table_id"] == tables[1].id
+
+
+def test_auto_assignment_gives_up_when_every_table_is_taken(customer_client, outlet, tables, race):
+    race.count = len(tables)
+
+    response = _book(customer_client, outlet)
+
+    assert response.status_code == 409
+    assert race.stolen == [t.id for t in tables]
+    # Only the competing bookings made it in
+    assert Reservation.query.count() == len(tables)
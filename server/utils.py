@@ -1,7 +1,13 @@
+import base64
+import hashlib
+from datetime import datetime, timedelta
+
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import get_jwt_identity
 from functools import wraps
-from flask import jsonify
+from flask import jsonify, request, make_response
+
+from extensions import catalog_cache, idempotency_store
 
 
 # Password Helpers
@@ -48,6 +54,97 @@ def role_required(required_role):
 customer_required = role_required("customer")
 outlet_required = role_required("outlet")
 
+
+# Keyset pagination cursors (opaque to clients)
+
+def encode_cursor(*values):
+    raw = "|".join(
+        v.isoformat() if isinstance(v, datetime) else str(v)
+        for v in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, *types):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded).decode()
+        parts = raw.split("|")
+        # Menu cursors handed out before these helpers were shared joined
+        # their ids with ":"; accepted for one more release
+        if len(parts) == 1 and len(types) > 1 and datetime not in types:
+            parts = raw.split(":")
+        if len(parts) != len(types):
+            raise ValueError
+        return tuple(
+            datetime.fromisoformat(part) if t is datetime else t(part)
+            for t, part in zip(types, parts)
+        )
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def parse_time_arg(value, end=False):
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError("Invalid date, expected ISO format")
+    # A bare date as upper bound covers the whole day
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def filter_time_range(query, column, args):
+    """Apply ?from= / ?to= (ISO date or datetime) to `column`."""
+    if args.get("from"):
+        query = query.filter(column >= parse_time_arg(args["from"]))
+
+    if args.get("to"):
+        to = args["to"]
+        upper = parse_time_arg(to, end=True)
+        if len(to) == 10:
+            query = query.filter(column < upper)
+        else:
+            query = query.filter(column <= upper)
+
+    return query
+
+
+# Conditional GET
+
+def catalog_etag(scopes):
+    """
+    Answer If-None-Match from the catalog versions alone.
+
+    `scopes` is a list of cache scopes or a callable building one from the
+    view kwargs. A matching request gets a 304 before the view (and the ORM)
+    runs; successful responses carry the ETag.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+
+            resolved = scopes(**kwargs) if callable(scopes) else scopes
+            etag = catalog_cache.etag(resolved)
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+
+            if response.status_code == 200:
+                response.set_etag(etag)
+                response.headers["Cache-Control"] = "no-cache"
+
+            return response
+
+        return wrapper
+    return decorator
+
 import re
 
 
@@ -124,3 +221,62 @@ def validate_outlet_data(data):
         return password_error
 
     return None
+
+
+# Idempotency keys
+
+def idempotent(fn):
+    """
+    Honour an Idempotency-Key header on a POST/PUT/PATCH view.
+
+    The first request with a key runs normally and its response is stored;
+    retries with the same key and body get that response back (marked with
+    Idempotent-Replayed) without running the view. Keys are scoped to the
+    caller and the endpoint. Server errors are not stored.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+
+        key = request.headers.get("Idempotency-Key")
+        if not key:
+            return fn(*args, **kwargs)
+
+        if len(key) > 255:
+            return jsonify({"error": "Idempotency-Key is too long"}), 400
+
+        identity = get_jwt_identity() or {}
+        scoped_key = f"{identity.get('role')}:{identity.get('id')}:{request.method}:{request.path}:{key}"
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+        state, stored = idempotency_store.begin(scoped_key, fingerprint)
+
+        if state == "mismatch":
+            return jsonify({"error": "Idempotency-Key was used with a different request"}), 422
+
+        if state == "busy":
+            return jsonify({"error": "A request with this Idempotency-Key is still in progress"}), 409
+
+        if state == "replay":
+            body, status, mimetype = stored
+            response = make_response(body, status)
+            response.mimetype = mimetype
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(fn(*args, **kwargs))
+        except Exception:
+            idempotency_store.release(scoped_key)
+            raise
+
+        if response.status_code >= 500:
+            idempotency_store.release(scoped_key)
+        else:
+            idempotency_store.complete(
+                scoped_key,
+                (response.get_data(), response.status_code, response.mimetype)
+            )
+
+        return response
+
+    return wrapper